@@ -0,0 +1,69 @@
+"""Times the local BM25 index of `db.search` on a synthetic corpus of review comments: the
+  build, then queries made of common and rare terms, without a database.
+
+  From the repository root: `python benchmarks/search.py --reviews 1000000`
+"""
+import sys
+from pathlib import Path
+from argparse import ArgumentParser
+from time import perf_counter
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from db.search import LocalBackend
+
+class Collection:
+  # the only collection method `LocalBackend.load` calls
+  def __init__(self, docs) -> None:
+    self.docs = docs
+
+  def find(self, query: dict, projection: dict):
+    return iter(self.docs)
+
+class Database(dict):
+  pass
+
+def comments(count: int, words: int, seed: int = 0) -> list[dict]:
+  # word frequencies follow Zipf's law like real text, so word 0 is the most common
+  rng = np.random.default_rng(seed)
+  ranks = np.minimum(rng.zipf(1.2, count * 12), words) - 1
+  lengths = rng.integers(4, 20, count)
+  ends = np.cumsum(lengths)
+  vocab = [ f"w{i}" for i in range(words) ]
+  return [
+    { '_id': i, 'comment': ' '.join(vocab[w] for w in ranks[end - length:end]) }
+    for i, (length, end) in enumerate(zip(lengths, ends))
+  ]
+
+def timed(backend: LocalBackend, db: Database, q: str, repeat: int) -> tuple[float, int]:
+  times = []
+  for _ in range(repeat):
+    started = perf_counter()
+    hits = backend.search(db, q, [ 'drinks', 'reviews' ], 20)
+    times.append(perf_counter() - started)
+  return (min(times), len(hits))
+
+if __name__ == '__main__':
+  parser = ArgumentParser(description = 'Times the local BM25 search index.')
+  parser.add_argument('--reviews', type = int, default = 1000000, help = 'reviews in the corpus')
+  parser.add_argument('--words', type = int, default = 50000, help = 'distinct words')
+  parser.add_argument('--repeat', type = int, default = 5, help = 'runs of each query, the best one is kept')
+  args = parser.parse_args()
+
+  db = Database(drinks = Collection([]), reviews = Collection(comments(args.reviews, args.words)))
+  backend = LocalBackend()
+
+  started = perf_counter()
+  backend.load(db)
+  print(f"build over {args.reviews} reviews: {perf_counter() - started:.2f}s, {len(backend.postings)} terms")
+
+  for q in ("w0", "w1 w2", "w10 w100", "w1000", "w0 w1 w2 w3"):
+    elapsed, hits = timed(backend, db, q, args.repeat)
+    postings = sum(len(backend.postings.get(term, ())) for term in set(q.split()))
+    print(f"query {q!r} over {postings} postings: {elapsed * 1000:.1f}ms, {hits} hits")
+
+  started = perf_counter()
+  for i in range(1000):
+    backend.add('reviews', { '_id': args.reviews + i, 'comment': "w5 w50 w500 w5000" })
+  each = (perf_counter() - started) / 1000
+  print(f"add of a review: {each * 1000:.3f}ms")
@@ -0,0 +1,76 @@
+"""Times encoding pages of Drinks and Reviews with `models.serialize`, against the path it
+  replaced: `toJSON` converting ObjectIds, sets, and dates by hand, then `json.dumps` as
+  Flask-RESTful did by default.
+
+  From the repository root: `python benchmarks/serialize.py --docs 10000`
+"""
+import sys
+import json
+from pathlib import Path
+from argparse import ArgumentParser
+from time import perf_counter
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from models import Drink, Review
+from models import serialize
+
+def models(count: int) -> list:
+  # half drinks with a few reviews each, half reviews
+  res = []
+  for i in range(count // 2):
+    drink = Drink(f"user{i}@test.com", f"drink {i}", [ [ "espresso", "2 shots" ], [ "milk", "8 oz" ] ], "", "A drink.")
+    drink._id = ObjectId()
+    drink.review_ids = { ObjectId() for _ in range(10) }
+    res.append(drink)
+
+    review = Review(f"user{i}@test.com", drink._id, "Smooth and sweet.", 4, drink.name, datetime(2022, 1, 1) + timedelta(minutes = i))
+    review._id = ObjectId()
+    res.append(review)
+  return res
+
+def legacy(model) -> dict:
+  # what toJSON did before, on a copy since it used to rewrite the model itself
+  res = dict(vars(model))
+  res['_id'] = str(res['_id'])
+  if isinstance(model, Drink):
+    res['review_ids'] = [ str(_id) for _id in model.review_ids ]
+  else:
+    res['drink_id'] = str(model.drink_id)
+    res['date'] = str(model.date)
+  return res
+
+def best(fn, repeat: int) -> float:
+  times = []
+  for _ in range(repeat):
+    started = perf_counter()
+    fn()
+    times.append(perf_counter() - started)
+  return min(times)
+
+if __name__ == '__main__':
+  parser = ArgumentParser(description = 'Times encoding pages of models as JSON.')
+  parser.add_argument('--docs', type = int, default = 10000, help = 'models in a page')
+  parser.add_argument('--repeat', type = int, default = 10, help = 'runs, the best one is kept')
+  args = parser.parse_args()
+
+  page = models(args.docs)
+  fast = serialize.orjson
+
+  def current(encoder):
+    serialize.orjson = encoder
+    return lambda: serialize.dumps({ 'data': [ m.toJSON() for m in page ] })
+
+  paths = {
+    'toJSON + json.dumps (before)': lambda: (json.dumps({ 'data': [ legacy(m) for m in page ] }) + "\n").encode('utf-8'),
+    'serialize.dumps with json': current(None)
+  }
+  for name, fn in paths.items():
+    print(f"{name}: {best(fn, args.repeat) * 1000:.1f}ms for {len(page)} models")
+
+  if fast is not None:
+    fn = current(fast)
+    print(f"serialize.dumps with orjson: {best(fn, args.repeat) * 1000:.1f}ms for {len(page)} models")
+  else:
+    print("orjson is not installed, `pip install orjson` to time it")
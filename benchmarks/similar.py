@@ -0,0 +1,55 @@
+"""Times `db.similar.build` over synthetic drinks: the scoring of every pair of drinks and the
+  top k of each, without a database. Writes go nowhere.
+
+  From the repository root: `python benchmarks/similar.py --drinks 100000`
+"""
+import sys
+from pathlib import Path
+from argparse import ArgumentParser
+from time import perf_counter
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+from db.similar import build
+
+class Collection:
+  # the only collection methods `build` calls
+  def __init__(self, docs: list[dict] = ()) -> None:
+    self.docs = docs
+
+  def find(self, query: dict, projection: dict) -> list[dict]:
+    return self.docs
+
+  def bulk_write(self, ops: list, ordered: bool = True) -> None:
+    pass
+
+  def delete_many(self, query: dict) -> None:
+    pass
+
+class Database:
+  def __init__(self, docs: list[dict]) -> None:
+    self.drinks = Collection(docs)
+    self.similar_drinks = Collection()
+
+def drinks(count: int, ingredients: int, seed: int = 0) -> list[dict]:
+  # a few ingredients are in most drinks, like real recipes
+  rng = np.random.default_rng(seed)
+  weights = 1 / np.arange(1, ingredients + 1)
+  weights /= weights.sum()
+  sizes = rng.integers(3, 9, count)
+  return [
+    { '_id': i, 'ingredient_keys': [ f"i{key}" for key in rng.choice(ingredients, size, replace = False, p = weights) ] }
+    for i, size in enumerate(sizes)
+  ]
+
+if __name__ == '__main__':
+  parser = ArgumentParser(description = 'Times the build of the similar drinks.')
+  parser.add_argument('--drinks', type = int, default = 100000, help = 'drinks scored')
+  parser.add_argument('--ingredients', type = int, default = 2000, help = 'distinct ingredients')
+  parser.add_argument('--k', type = int, default = 20, help = 'neighbors kept per drink')
+  args = parser.parse_args()
+
+  db = Database(drinks(args.drinks, args.ingredients))
+  started = perf_counter()
+  build(db, args.k)
+  print(f"build of {args.drinks} drinks: {perf_counter() - started:.2f}s")
@@ -0,0 +1,266 @@
+from os import environ, getpid
+from collections import OrderedDict
+from itertools import count
+from threading import Lock
+from time import monotonic, time
+from bson import encode, decode
+
+class DictBackend:
+  def __init__(self) -> None:
+    """In-memory stand-in for a shared backend such as Redis, used for local development and
+      tests. Any object with the same `get`, `mget`, `set`, `delete`, and `incr` methods can be
+      shared instead, e.g. a `redis.Redis` client.
+    """
+    self.data = {}
+    self.lock = Lock()
+
+  def get(self, key: str) -> bytes or None:
+    entry = self.data.get(key)
+    if entry is None:
+      return None
+
+    value, expires = entry
+    if expires < time():
+      self.data.pop(key, None)
+      return None
+    return value
+
+  def mget(self, keys: list[str]) -> list[bytes or None]:
+    return [ self.get(key) for key in keys ]
+
+  def set(self, key: str, value: bytes, ttl: int) -> None:
+    self.data[key] = (value, time() + ttl)
+
+  def delete(self, *keys: str) -> None:
+    for key in keys:
+      self.data.pop(key, None)
+
+  def incr(self, key: str) -> int:
+    with self.lock:
+      value = int(self.get(key) or 0) + 1
+      self.data[key] = (str(value).encode(), float('inf'))
+    return value
+
+class Cache:
+  def __init__(self, maxsize: int = 1024, ttl: float = 30.0, shared = None) -> None:
+    """A thread-safe LRU cache of MongoDB documents where every entry expires after ttl seconds.
+      Documents handed out by the cache are shared, so they must be treated as read-only.
+
+      Every key has a generation that `delete` moves forward, and every entry records the
+      generation it was read at, so an entry is only served while no change was made after it
+      was read. Callers take a `token` before reading a document from the database and `set`
+      it with that token; a document read before a concurrent change is never cached.
+
+      Without a shared backend, generations live in this process, which is enough for a single
+      worker. With one (see `getCache`), generations live in the backend so a change made by
+      any worker invalidates the entries of every worker. Entries are still held in this
+      process; a hit costs one round trip to check its generation instead of a transfer.
+
+      Arguments:
+        - maxsize { int, optional }: max documents held in this process, 0 disables the cache.
+          Defaults to 1024
+        - ttl { float, optional }: seconds before an entry expires. Defaults to 30.0
+        - shared { object, optional }: backend with `get`, `mget`, `set`, `delete`, and `incr`
+          methods, see `DictBackend`. Defaults to None
+    """
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.shared = shared
+    self.entries = OrderedDict() # key -> (doc, generation, expires)
+    self.gens = OrderedDict() # key -> generation, without a shared backend
+    self.floor = 0 # generation of the keys whose generation was forgotten
+    self.clock = count(1)
+    self.lock = Lock()
+    self.hits = 0
+    self.shared_hits = 0
+    self.misses = 0
+
+  def token(self, key: str) -> int:
+    """Returns the current generation of key. Must be taken before the document is read from
+      the database, see `set`.
+
+      Arguments:
+        - key { str }
+
+      Returns:
+        - `int`
+    """
+    return self.tokens([ key ])[0]
+
+  def tokens(self, keys: list[str]) -> list[int]:
+    """Batched version of `token`, a single round trip to the shared backend.
+
+      Arguments:
+        - keys { list[str] }
+
+      Returns:
+        - `list[int]`: the generation of each key
+    """
+    if not self.maxsize or not len(keys):
+      return [ 0 for _ in keys ]
+    if self.shared is not None:
+      return [ int(gen or 0) for gen in self.shared.mget([ f"gen:{key}" for key in keys ]) ]
+    with self.lock:
+      return [ self.gens.get(key, self.floor) for key in keys ]
+
+  def get(self, key: str) -> dict or None:
+    """Gets the document cached under key.
+
+      Arguments:
+        - key { str }
+
+      Returns:
+        - `dict` or `None`: the document if it is cached, fresh, and unchanged since it was
+          read. `None` otherwise.
+    """
+    return self.getMany([ key ])[0]
+
+  def getMany(self, keys: list[str]) -> list[dict or None]:
+    """Batched version of `get`, at most two round trips to the shared backend.
+
+      Arguments:
+        - keys { list[str] }
+
+      Returns:
+        - `list[dict or None]`: the document of each key, `None` for the misses
+    """
+    if not self.maxsize or not len(keys):
+      return [ None for _ in keys ]
+
+    gens = self.tokens(keys)
+    now = monotonic()
+    res = []
+    with self.lock:
+      for key, gen in zip(keys, gens):
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] == gen and entry[2] > now:
+          self.entries.move_to_end(key)
+          self.hits += 1
+          res.append(entry[0])
+        else:
+          self.entries.pop(key, None)
+          res.append(None)
+
+    # fall back to the shared backend
+    missing = [ i for i, doc in enumerate(res) if doc is None ]
+    if self.shared is not None and len(missing):
+      for i, raw in zip(missing, self.shared.mget([ keys[i] for i in missing ])):
+        entry = decode(raw) if raw is not None else None
+        if entry is not None and entry['gen'] == gens[i]:
+          res[i] = entry['doc']
+          with self.lock:
+            self._store(keys[i], entry['doc'], gens[i])
+            self.shared_hits += 1
+
+    with self.lock:
+      self.misses += sum(1 for doc in res if doc is None)
+    return res
+
+  def set(self, key: str, doc: dict, token: int) -> None:
+    """Caches doc under key, unless key changed since token was taken.
+
+      Arguments:
+        - key { str }
+        - doc { dict }: a MongoDB document
+        - token { int }: the generation taken with `token` before doc was read
+    """
+    if not self.maxsize:
+      return
+
+    with self.lock:
+      # checked under the lock so a concurrent delete can't slip in between
+      if self.shared is None and self.gens.get(key, self.floor) != token:
+        return
+      self._store(key, doc, token)
+
+    if self.shared is not None:
+      # readers compare the generation, so a change racing this set is never served
+      self.shared.set(key, encode({ 'gen': token, 'doc': doc }), int(self.ttl))
+
+  def delete(self, *keys: str) -> None:
+    """Invalidates every key given, in every worker sharing the backend.
+
+      Arguments:
+        - keys { str }
+    """
+    if not self.maxsize or not len(keys):
+      return
+
+    if self.shared is not None:
+      # generations outlive the entries they guard
+      gen = self.shared.incr("gen")
+      for key in keys:
+        self.shared.set(f"gen:{key}", str(gen).encode(), int(self.ttl * 2) + 1)
+      self.shared.delete(*keys)
+      with self.lock:
+        for key in keys:
+          self.entries.pop(key, None)
+      return
+
+    with self.lock:
+      gen = next(self.clock)
+      for key in keys:
+        self.entries.pop(key, None)
+        self.gens[key] = gen
+        self.gens.move_to_end(key)
+      # forgotten generations read as the newest one forgotten, so tokens taken before it
+      # are still rejected
+      while len(self.gens) > self.maxsize * 16:
+        self.floor = max(self.floor, self.gens.popitem(last = False)[1])
+
+  def clear(self) -> None:
+    """Drops every entry held by this process and resets the counters."""
+    with self.lock:
+      self.entries.clear()
+      self.hits = self.shared_hits = self.misses = 0
+
+  def stats(self) -> dict:
+    """Returns the hit and miss counters of this process.
+
+      Returns:
+        - `dict`: `hits`, `shared_hits`, `misses`, and the number of cached documents
+    """
+    with self.lock:
+      return {
+        'hits': self.hits,
+        'shared_hits': self.shared_hits,
+        'misses': self.misses,
+        'size': len(self.entries)
+      }
+
+  def _store(self, key: str, doc: dict, gen: int) -> None:
+    # callers hold the lock
+    self.entries[key] = (doc, gen, monotonic() + self.ttl)
+    self.entries.move_to_end(key)
+    # evict the least recently used
+    while len(self.entries) > self.maxsize:
+      self.entries.popitem(last = False)
+
+_cache: Cache = None
+_pid: int = None
+_lock = Lock()
+
+def getCache() -> Cache:
+  """Returns the process-wide document cache, created on first use from `CACHE_SIZE`,
+    `CACHE_TTL`, and `CACHE_URL`. With `CACHE_URL`, workers share generations and entries
+    through Redis (`pip install redis`), which every deployment with more than one worker needs
+    for changes to be seen by every worker. Forked workers get their own cache since a lock
+    held by another thread at the fork would never be released in the child.
+
+    Returns:
+      - `Cache`
+  """
+  global _cache, _pid
+  if _cache is None or _pid != getpid():
+    with _lock:
+      if _cache is None or _pid != getpid():
+        shared = None
+        if environ.get('CACHE_URL'):
+          # optional, only needed with more than one worker
+          from redis import Redis
+          shared = Redis.from_url(environ['CACHE_URL'])
+        _cache = Cache(
+          int(environ.get('CACHE_SIZE', 1024)), float(environ.get('CACHE_TTL', 30)), shared
+        )
+        _pid = getpid()
+  return _cache
@@ -1,36 +1,200 @@
-from os import environ
+from os import environ, getpid, register_at_fork
+from threading import Lock
+from collections import defaultdict, Counter
+from itertools import islice
+from time import monotonic
+from math import log2
+from datetime import datetime, timedelta
 from bson import ObjectId
-from pymongo import ReturnDocument, MongoClient
+from pymongo import ReturnDocument, MongoClient, UpdateOne
 from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 from models import User, Review, Drink
+from db.pagination import paginate, paginatePipeline, parseSort
+from db.cache import getCache
+from db.sampler import getSampler
+from db.search import getSearch, tokenize, highlight, TEXT_FIELDS
+from db.suggest import getSuggester
+from db.similar import similarTo
+from db import events
 from logging import getLogger
 import __main__
 
+# the fields models are built from, which is everything read endpoints return
+PROJECTIONS = {
+  'users': {
+    'fname': 1, 'lname': 1, 'email': 1, 'pw': 1, 'ver': 1,
+    'review_ids': 1, 'drink_ids': 1, 'favorite_ids': 1
+  },
+  'drinks': {
+    'user_email': 1, 'name': 1, 'review_ids': 1, 'ingredients': 1,
+    'rating': 1, 'sum': 1, 'count': 1, 'img': 1, 'des': 1
+  },
+  'reviews': {
+    'user_email': 1, 'drink_id': 1, 'comment': 1, 'rating': 1, 'date': 1, 'drink_name': 1
+  }
+}
+
+# fields never returned by read endpoints
+HIDDEN = { 'users': { 'pw' } }
+
+# the fields read endpoints return by default
+READ_PROJECTIONS = {
+  collection: { k: v for k, v in projection.items() if k not in HIDDEN[collection] }
+    if collection in HIDDEN else projection
+  for collection, projection in PROJECTIONS.items()
+}
+
+# related documents that can be embedded with `include`, by collection:
+# name -> (collection, local field, foreign field, many)
+RELATIONS = {
+  'users': {
+    'drinks': ('drinks', 'email', 'user_email', True),
+    'favorites': ('drinks', 'favorite_ids', '_id', True),
+    'reviews': ('reviews', 'email', 'user_email', True)
+  },
+  'drinks': {
+    'reviews': ('reviews', '_id', 'drink_id', True)
+  },
+  'reviews': {
+    'drink': ('drinks', 'drink_id', '_id', False)
+  }
+}
+INCLUDE_LIMIT = 20
+INCLUDE_MAX = 100
+
+# a review made one half-life later counts twice as much towards `trend`, so sorting by
+# `trend` ranks drinks by their exponentially decayed ratings without ever rescoring them.
+# `trend` holds the log2 of that sum, which grows by one per half-life instead of doubling
+TREND_EPOCH = datetime(2022, 1, 1)
+TREND_HALFLIFE = timedelta(days = 7)
+NUMBER_TYPES = [ 'double', 'int', 'long', 'decimal' ]
+
+# leaderboards of drinks: name -> (sort, filter)
+RANKINGS = {
+  'top': ('-rating', { 'rating': { '$gte': 0 } }),
+  'trending': ('-trend', { 'trend': { '$type': 'number' } })
+}
+
+# error code of a write rejected by a unique index
+DUPLICATE_KEY = 11000
+
+# items of a user that personalize their feed, see `db.feed`
+FEED_ITEMS = { 'review', 'favorite' }
+
+# how ingredient searches combine their ingredients
+MATCHES = { 'all': '$all', 'any': '$in' }
+
+def ingredientKey(name: str) -> str:
+  """Normalizes an ingredient name so spelling variants such as "Strawberry " and "strawberry"
+    are indexed under the same key.
+
+    Arguments:
+      - name { str }
+
+    Returns:
+      - `str`: the key, empty if name has no words
+  """
+  return " ".join(str(name).lower().split())
+
+def ingredientKeys(ingredients: list) -> list[str]:
+  """Returns the distinct keys of a drink's ingredients, stored as `ingredient_keys` so drinks
+    can be found by ingredient through a multikey index.
+
+    Arguments:
+      - ingredients { list }: `[ingredient, unit]` pairs, see `Drink`
+
+    Returns:
+      - `list[str]`
+  """
+  names = ( item[0] if isinstance(item, (list, tuple)) else item for item in ingredients or [] )
+  keys = ( ingredientKey(name) for name in names if name is not None )
+  return list(dict.fromkeys(key for key in keys if key))
+
+# process-wide client shared by every DBdriver
+_mongo: MongoClient = None
+_pid: int = None
+_last_ping = 0.0
+_lock = Lock()
+
+def _poolOptions() -> dict:
+  """Reads the MongoClient pool options from the environment.
+
+    Returns:
+      - `dict`: keyword arguments for `MongoClient`
+  """
+  return {
+    'maxPoolSize': int(environ.get('MONGODB_MAX_POOL_SIZE', 100)),
+    'minPoolSize': int(environ.get('MONGODB_MIN_POOL_SIZE', 0)),
+    'maxIdleTimeMS': int(environ.get('MONGODB_MAX_IDLE_MS', 60000)),
+    'waitQueueTimeoutMS': int(environ.get('MONGODB_WAIT_QUEUE_MS', 5000)),
+    'serverSelectionTimeoutMS': int(environ.get('MONGODB_SELECTION_MS', 5000))
+  }
+
+def _resetAfterFork() -> None:
+  """Drops the parent's client in a freshly forked child (e.g. a gunicorn worker).
+    The sockets belong to the parent, so the child lazily builds its own pool.
+  """
+  global _mongo, _pid, _last_ping, _lock
+  _mongo = None
+  _pid = None
+  _last_ping = 0.0
+  _lock = Lock()
+
+register_at_fork(after_in_child=_resetAfterFork)
+
+def getClient() -> MongoClient:
+  """Returns the process-wide MongoClient, creating it on first use. The connection is
+    health checked at most once every `MONGODB_PING_INTERVAL` seconds instead of per request.
+
+    Raises:
+      - `ConnectionError`: Raised if the health check failed to reach MongoDB
+
+    Returns:
+      - `MongoClient`: the shared client for this process
+  """
+  global _mongo, _pid, _last_ping
+
+  # build the client once per process
+  if _mongo is None or _pid != getpid():
+    with _lock:
+      if _mongo is None or _pid != getpid():
+        # connect = False so nothing is opened before a fork
+        _mongo = MongoClient(environ['MONGODB_URI'], connect = False, **_poolOptions())
+        _pid = getpid()
+        _last_ping = 0.0
+
+  # health check on an interval
+  now = monotonic()
+  if now - _last_ping >= float(environ.get('MONGODB_PING_INTERVAL', 30)):
+    _last_ping = now
+    try:
+      # ping is cheap and doesn't require auth
+      _mongo.admin.command('ping')
+      getLogger(__main__.__name__).info('Connected to MongoDB')
+    except Exception:
+      _last_ping = 0.0
+      raise ConnectionError('Failed to connect to MongoDB')
+
+  return _mongo
+
 class DBdriver:
   def __init__(self) -> None:
-    """A driver used to make writing and reading from the database easier.
+    """A driver used to make writing and reading from the database easier. Every driver
+      shares the pooled client of this process, so creating one per request is cheap.
 
       Raises:
         - `ConnectionError`: Raised if the driver failed to connect to MongoDB
     """
-    mongo = MongoClient(environ['MONGODB_URI'])
-    logger = getLogger(__main__.__name__)
+    mongo = getClient()
 
-    try:
-      # ping is cheap and doesn't require auth
-      mongo.admin.command('ping')
-      logger.info('Connected to MongoDB')
-    except:
-      raise ConnectionError('Failed to connect to MongoDB')
-    
     # connect to the capstone database
     self.client: Database = mongo.capstone
     self.mongo = mongo
-    self.serializers = {
-      'drink': self.toDrink,
-      'review': self.toReview,
-      'user': self.toUser
-    }
+    self.cache = getCache()
+    self.sampler = getSampler()
+    self.searcher = getSearch()
+    self.suggester = getSuggester()
     
   # region User
 
@@ -41,7 +205,7 @@ class DBdriver:
         - `User` or `None`: User object if the user exists. `None` otherwise.
     """
     # query for the user
-    res = self.client.users.find_one({ 'email': email })
+    res = self._cached('users', 'email', email)
     return self.toUser(res) if res else None
 
   def createUser(self, fname: str, lname: str, email: str, pw: str) -> User:
@@ -56,11 +220,6 @@ class DBdriver:
       Returns:
         - `User`: the newly created User. If the user already exists, returns it.
     """
-    # check if this user exists and return it
-    existing_user = self.getUser(email)
-    if existing_user:
-      return existing_user
-
     # create a new user
     temp = User(fname, lname, email, pw)
     # grab the dict for Mongo
@@ -68,41 +227,31 @@ class DBdriver:
     for type in User.types:
       doc[type + '_ids'] = list(doc[type + '_ids'])
     
-    # create in db and return
-    temp._id = self.client.users.insert_one(doc).inserted_id
-    return temp
+    # create in db or grab the existing user
+    res, _ = self._insertOnce('users', { 'email': email }, doc)
+    return self.toUser(res)
 
-  def getItems(self, type: str, email: str) -> list:
-    """Returns all items of 'type' created by this user.
+  def bulkCreateUsers(self, users: list[tuple]) -> list[User or Exception]:
+    """Bulk version of `createUser`: creates every User with a single `insert_many`.
 
       Arguments:
-        - type { str }: Must be one of ['drink', 'review', 'favorite', 'img']
-        - email { str }
+        - users { list[tuple] }: (fname, lname, email, pw) of each User, pw already hashed
 
-      Raises:
-        - `ValueError`: if type is not one of ['drink', 'favorite', 'review', 'img']
-      
       Returns:
-        - `list`: list of type objects for the given user. If type is 'favorite'
-          a list of Drinks will be returned.
+        - `list[User or Exception]`: the User of each item in order, the existing one if the
+          email is taken. An exception in place of the Users that couldn't be inserted.
     """
-    if type not in User.types:
-      raise ValueError(f"`type` must be one of {User.types}")
-
-    # grab ObjectIds
-    qres = self.client.users.find_one({ 'email': email }, { "_id": 0, f"{type}_ids": 1 })
-
-    if qres is None:
-      raise KeyError(f"User with email {email} DNE")
-
-    _ids = qres[f"{type}_ids"]
-    # set type to align with collections
-    type = 'drink' if type == 'favorite' else type
-    # grab Objects
-    res = []
-    for item in self.client[f"{type}s"].find({ '_id': { '$in': _ids } }):
-      res.append(self.serializers[type](item))
-    return res
+    docs = []
+    for fname, lname, email, pw in users:
+      doc = vars(User(fname, lname, email, pw)).copy()
+      for type in User.types:
+        doc[type + '_ids'] = list(doc[type + '_ids'])
+      docs.append(doc)
+
+    return [
+      self.toUser(res) if res is not None else RuntimeError(f"Failed to create user `{doc['email']}`")
+      for doc, (res, _) in zip(docs, self._insertMany('users', [ 'email' ], docs))
+    ]
 
   def updateUser(self, email: str, fields: dict) -> User or None:
     """Updates the fields of User by email. If DNE, returns `None`.
@@ -126,11 +275,17 @@ class DBdriver:
     if len(fields) == 0:
       return None
 
+    # a new password revokes every token issued before it
+    update = { '$set': fields }
+    if 'pw' in fields:
+      update['$inc'] = { 'ver': 1 }
+
     # attempt to update in db
     res = self.client.users.find_one_and_update(
-      { 'email': email }, { '$set': fields },
+      { 'email': email }, update,
       return_document = ReturnDocument.AFTER
     )
+    self._invalidate('users', email)
 
     return self.toUser(res) if res else None
 
@@ -144,6 +299,10 @@ class DBdriver:
         - `bool`: True if the user was deleted, False otherwise.
     """
     res = self.client.users.find_one_and_delete({ "email": email })
+    self._invalidate('users', email)
+    if res:
+      self.client.feeds.delete_one({ "_id": email })
+      self.cache.delete(f"feeds:{email}")
     return bool(res)
     
   # endregion
@@ -156,7 +315,7 @@ class DBdriver:
       Returns:
         - `Review` or `None`: Review object if the Review exists. `None` otherwise.
     """
-    res = self.client.reviews.find_one({ '_id': _id })
+    res = self._cached('reviews', '_id', _id)
     return self.toReview(res) if res else None
 
   def createReview(self, user_email: str, drink_id: ObjectId, comment: str, rating: int) -> Review:
@@ -168,60 +327,166 @@ class DBdriver:
         - comment { str }
         - rating { int }
 
+      Raises:
+        - `KeyError`: raised if Drink with the given drink_id DNE.
+
       Returns:
         - `Review`
           - The newly created Review. If the review already exists, returns it.
     """
-    # check if the review exists
-    existing_review = self.client.reviews.find_one({ 'user_email': user_email, 'drink_id': drink_id })
-    if existing_review:
-      return self.toReview(existing_review)
-
-    drink = self.getDrink(drink_id)
+    drink = self.client.drinks.find_one({ '_id': drink_id }, { 'name': 1 })
+    if drink is None:
+      raise KeyError(f"Drink with _id {drink_id} DNE")
 
-    # create the Review in the DB
-    temp = Review(user_email, drink_id, comment, rating, drink.name)
-    temp._id = self.client.reviews.insert_one(vars(temp)).inserted_id
+    # create the Review in the DB or grab the existing review
+    temp = Review(user_email, drink_id, comment, rating, drink['name'])
+    res, inserted = self._insertOnce(
+      'reviews', { 'user_email': user_email, 'drink_id': drink_id }, vars(temp).copy()
+    )
+    if not inserted:
+      return self.toReview(res)
 
     # attach it to a drink
-    self.attachReview(drink_id, temp._id, rating)
+    temp._id = res['_id']
+    self.attachReview(drink_id, temp._id, rating, temp.date)
     self.attachItem('review', user_email, temp._id)
+    events.publish('reviews', 'create', temp._id, res)
     return temp
 
+  def bulkCreateReviews(self, reviews: list[tuple]) -> list[Review or Exception]:
+    """Bulk version of `createReview`: inserts every Review with a single `insert_many`, then
+      folds the ratings into each drink with one update per drink and attaches the reviews to
+      each user with one update per user.
+
+      Arguments:
+        - reviews { list[tuple] }: (user_email, drink_id, comment, rating) of each Review
+
+      Returns:
+        - `list[Review or Exception]`: the Review of each item in order, the existing one if
+          the user already reviewed the drink. A `KeyError` in place of the reviews whose drink
+          or user DNE, another exception if the review couldn't be inserted.
+    """
+    if not len(reviews):
+      return []
+
+    # grab the drinks and users that exist
+    drink_ids = list({ review[1] for review in reviews })
+    names = { doc['_id']: doc['name'] for doc in self.client.drinks.find({ '_id': { '$in': drink_ids } }, { 'name': 1 }) }
+    emails = list({ review[0] for review in reviews })
+    users = { doc['email'] for doc in self.client.users.find({ 'email': { '$in': emails } }, { 'email': 1 }) }
+
+    res = []
+    docs = []
+    for user_email, drink_id, comment, rating in reviews:
+      if drink_id not in names:
+        res.append(KeyError(f"Drink with _id {drink_id} DNE"))
+      elif user_email not in users:
+        res.append(KeyError(f"User with email `{user_email}` DNE"))
+      else:
+        doc = vars(Review(user_email, drink_id, comment, rating, names[drink_id])).copy()
+        res.append(doc)
+        docs.append(doc)
+
+    # aggregate what the new reviews change per drink and per user
+    created = []
+    drinks = defaultdict(lambda: [ 0, 0, [], [] ])
+    attach = defaultdict(list)
+    stored = iter(self._insertMany('reviews', [ 'user_email', 'drink_id' ], docs))
+    for i, doc in enumerate(res):
+      if not isinstance(doc, dict):
+        continue
+
+      found, inserted = next(stored)
+      if found is None:
+        res[i] = RuntimeError(f"Failed to create review of drink {doc['drink_id']}")
+        continue
+      res[i] = self.toReview(found)
+      if inserted:
+        created.append(found)
+        delta = drinks[found['drink_id']]
+        delta[0] += found['rating']
+        delta[1] += 1
+        delta[2].append(self._trendTerm(found['rating'], found['date']))
+        delta[3].append(found['_id'])
+        attach[found['user_email']].append(found['_id'])
+
+    if len(drinks):
+      self.client.drinks.bulk_write([
+        UpdateOne({ '_id': drink_id }, self._ratingUpdate(
+          sum_delta, count_delta, { '$concatArrays': [ '$review_ids', ids ] }, self._trendSum(terms)
+        ))
+        for drink_id, (sum_delta, count_delta, terms, ids) in drinks.items()
+      ], ordered = False)
+      self._invalidate('drinks', *drinks)
+    if len(attach):
+      self.client.users.bulk_write([
+        UpdateOne({ 'email': email }, {
+          '$addToSet': { 'review_ids': { '$each': ids } },
+          '$set': { 'feed_dirty': True }
+        })
+        for email, ids in attach.items()
+      ], ordered = False)
+      self._invalidate('users', *attach)
+
+    for doc in created:
+      events.publish('reviews', 'create', doc['_id'], doc)
+    return res
+
   def updateReview(self, _id: ObjectId, fields: dict) -> Review or tuple[Review, int]:
+    """Updates the fields of Review by _id. If the rating changes, the drink's rating is
+      adjusted atomically by the difference.
+
+      Arguments:
+        - _id { ObjectId }
+        - fields { dict }: k, v pairs of the fields to be updated and their new values
+
+      Returns:
+        - `Review`: the updated Review if the rating did not change
+        - `tuple[Review, int]`: the updated Review and the new rating of its drink
+        - `None`: if fields is an empty dict or Review DNE.
+    """
     if len(fields) == 0:
       return None
 
     if "rating" in fields:
-      # grab the old review
-      old = self.getReview(_id)
+      # update and grab the old rating in one trip
+      old = self.client.reviews.find_one_and_update(
+        { "_id": _id }, { "$set": fields },
+        return_document = ReturnDocument.BEFORE
+      )
 
       # return if DNE
       if old is None:
         return None
 
-      # attempt to update in the db
-      res = self.client.reviews.find_one_and_update(
-        { "_id": _id }, { "$set": fields },
+      res = dict(old, **fields)
+      self._invalidate('reviews', _id)
+
+      # shift the drink's sum and trend by the difference
+      diff = res["rating"] - old["rating"]
+      drink = self.client.drinks.find_one_and_update(
+        { "_id": res["drink_id"], "review_ids": _id },
+        self._ratingUpdate(diff, 0, trend_delta = self._trendTerm(diff, old.get("date"))),
+        projection = { "rating": 1 },
         return_document = ReturnDocument.AFTER
       )
+      self._invalidate('drinks', res["drink_id"])
+      self.client.users.update_one({ "email": res["user_email"] }, { "$set": { "feed_dirty": True } })
+      events.publish('reviews', 'update', _id, res)
 
-      # grab the drink 
-      drink = self.getDrink(res["drink_id"])
-      drink.sum -= old.rating
-      drink.update_rating(res["rating"])
-
-      # update the drink
-      self.updateDrink(drink._id, { "rating": drink.rating, "sum": drink.sum })
-
-      return (self.toReview(res), drink.rating)
+      return (self.toReview(res), drink["rating"] if drink else None)
     else:
       # attempt to update in the db
       res = self.client.reviews.find_one_and_update(
         { "_id": _id }, { "$set": fields },
         return_document = ReturnDocument.AFTER
       )
-      return self.toReview(res) if res else None
+      self._invalidate('reviews', _id)
+      if res is None:
+        return None
+
+      events.publish('reviews', 'update', _id, res)
+      return self.toReview(res)
 
   def deleteReview(self, review_id: ObjectId) -> bool:
     """Deletes a Review by _id in the db.
@@ -235,31 +500,16 @@ class DBdriver:
     res = self.client.reviews.find_one_and_delete({ '_id': review_id })
     if not res:
       return False
+    self._invalidate('reviews', review_id)
+    self.sampler.discard('reviews', review_id)
+    events.publish('reviews', 'delete', review_id)
     
     # update the drink
-    self.detachReview(res['drink_id'], review_id, res['rating'])
+    self.detachReview(res['drink_id'], review_id, res['rating'], res.get('date'))
     # update the user
     self.detachItem('review', res['user_email'], review_id)
     return True
 
-  def sampleReviews(self, size: int) -> list[Review]:
-    """Returns size random reviews from the database
-
-      Arguments:
-        - size { int }: the number of random reviews to be retrieved
-
-      Raises:
-        - `ValueError`: Raised if size is not a non-zero positive integer.
-      
-      Returns:
-        - `list[Review]`: A list of random reviews.
-    """
-    if size < 0:
-      raise ValueError("Parameter `size` must be a positive non-zero integer.")
-
-    res = self.client.reviews.aggregate([{ "$sample": { "size": size } }])
-    return [ self.toReview(review) for review in res ]
-  
   # endregion
 
   # region Drink
@@ -270,7 +520,7 @@ class DBdriver:
       Returns:
         - `Drink or None`: Drink object if the Drink exists. `None` otherwise.
     """
-    res = self.client.drinks.find_one({ '_id': _id })
+    res = self._cached('drinks', '_id', _id)
     return self.toDrink(res) if res else None
 
   def createDrink(self, user_email: str, name: str, ingredients: list, img: str, des: str) -> Drink:
@@ -283,38 +533,80 @@ class DBdriver:
       Returns:
         - `Drink`: The newly created Drink. If the drink already exists, returns it.
     """
-    existing_drink = self.client.drinks.find_one({ 'user_email': user_email, 'name': name })
-    if existing_drink:
-      return self.toDrink(existing_drink)
-
     # create new Drink
     temp = Drink(user_email, name, ingredients, img, des)
     doc = vars(temp).copy()
     doc['review_ids'] = list(doc['review_ids'])
+    doc['ingredient_keys'] = ingredientKeys(ingredients)
 
-    # insert drink into db
-    temp._id = self.client.drinks.insert_one(doc).inserted_id
+    # insert drink into db or grab the existing drink
+    res, inserted = self._insertOnce('drinks', { 'user_email': user_email, 'name': name }, doc)
+    if not inserted:
+      return self.toDrink(res)
+    temp._id = res['_id']
 
     # add drink id to this user
     self.attachItem('drink', user_email, temp._id)
+    events.publish('drinks', 'create', temp._id, res)
     return temp
   
-  def getReviews(self, drink_id: ObjectId) -> list[Review]:
-    """Returns a list of Reviews attached to this drink.
+  def bulkCreateDrinks(self, drinks: list[tuple]) -> list[Drink or Exception]:
+    """Bulk version of `createDrink`: inserts every Drink with a single `insert_many` and
+      attaches them to each user with one update per user.
 
       Arguments:
-        - drink_id { ObjectId }
+        - drinks { list[tuple] }: (user_email, name, ingredients, img, des) of each Drink
+
+      Returns:
+        - `list[Drink or Exception]`: the Drink of each item in order, the existing one if the
+          user already has a drink with that name. A `KeyError` in place of the drinks whose
+          user DNE, another exception if the drink couldn't be inserted.
     """
-    qres = self.client.drinks.find_one({ '_id': drink_id }, { '_id': 0, 'review_ids': 1 })
+    if not len(drinks):
+      return []
 
-    if qres is None:
-      raise KeyError(f"Drink with drink_id {drink_id} DNE")
+    # grab the users that exist
+    emails = list({ drink[0] for drink in drinks })
+    users = { doc['email'] for doc in self.client.users.find({ 'email': { '$in': emails } }, { 'email': 1 }) }
 
-    _ids = qres["review_ids"]
     res = []
-    for item in self.client.reviews.find({ '_id': { '$in': _ids } }):
-      res.append(self.toReview(item))
-    
+    docs = []
+    for user_email, name, ingredients, img, des in drinks:
+      if user_email not in users:
+        res.append(KeyError(f"User with email `{user_email}` DNE"))
+        continue
+      doc = vars(Drink(user_email, name, ingredients, img, des)).copy()
+      doc['review_ids'] = list(doc['review_ids'])
+      doc['ingredient_keys'] = ingredientKeys(ingredients)
+      res.append(doc)
+      docs.append(doc)
+
+    created = []
+    attach = defaultdict(list)
+    stored = iter(self._insertMany('drinks', [ 'user_email', 'name' ], docs))
+    for i, doc in enumerate(res):
+      if not isinstance(doc, dict):
+        continue
+
+      found, inserted = next(stored)
+      if found is None:
+        res[i] = RuntimeError(f"Failed to create drink `{doc['name']}`")
+        continue
+      res[i] = self.toDrink(found)
+      if inserted:
+        created.append(found)
+        attach[found['user_email']].append(found['_id'])
+
+    # add the drink ids to their users
+    if len(attach):
+      self.client.users.bulk_write([
+        UpdateOne({ 'email': email }, { '$addToSet': { 'drink_ids': { '$each': ids } } })
+        for email, ids in attach.items()
+      ], ordered = False)
+      self._invalidate('users', *attach)
+
+    for doc in created:
+      events.publish('drinks', 'create', doc['_id'], doc)
     return res
 
   def updateDrink(self, _id: ObjectId, fields: dict) -> Drink or None:
@@ -328,13 +620,24 @@ class DBdriver:
         - `Drink`: the updated Drink.
         - `None`: if Drink DNE.
     """    
+    # keep the ingredient index in step
+    if 'ingredients' in fields:
+      fields = dict(fields, ingredient_keys = ingredientKeys(fields['ingredients']))
+
     # attempt to update in db
     res = self.client.drinks.find_one_and_update(
       { "_id": _id }, { "$set": fields },
       return_document = ReturnDocument.AFTER
     )
+    self._invalidate('drinks', _id)
+    if res is None:
+      return None
 
-    return self.toDrink(res) if res else None
+    # scored on the fly until the next build of the similar drinks
+    if 'ingredients' in fields:
+      self.client.similar_drinks.delete_one({ '_id': _id })
+    events.publish('drinks', 'update', _id, res)
+    return self.toDrink(res)
 
   def deleteDrink(self, _id: ObjectId) -> bool:
     """Deletes a Drink by _id in the db.
@@ -345,42 +648,912 @@ class DBdriver:
       Returns:
           - `bool`: True if the Drink was removed, False otherwise.
     """
-    # get the drink
-    drink = self.getDrink(_id)
+    return self.deleteDrinks([ _id ])[0]
 
-    # delete every review in the drink
-    for id in drink.review_ids:
-      self.deleteReview(id)
-    
-    # delete the drink from the user
-    self.detachItem("drink", drink.user_email, _id)
+  def deleteDrinks(self, _ids: list[ObjectId]) -> list[bool]:
+    """Deletes many Drinks by _id along with their reviews. The drinks and reviews are also
+      detached from their creators and from every user who favorited the drinks. The cascade
+      takes the same number of round trips no matter how many drinks or reviews are involved.
 
-    # delete the drink
-    res = self.client.drinks.find_one_and_delete({ "_id": _id })
-    return bool(res)
+      Arguments:
+        - _ids { list[ObjectId] }
 
-  def sampleDrinks(self, size: int) -> list[Drink]:
-    """Returns size random drinks from the database
+      Returns:
+        - `list[bool]`: for each _id, True if the Drink was removed, False otherwise.
+    """
+    if not len(_ids):
+      return []
+
+    # grab the drinks that exist
+    drinks = list(self.client.drinks.find({ '_id': { '$in': _ids } }, { 'user_email': 1 }))
+    found = [ drink['_id'] for drink in drinks ]
+    if not len(found):
+      return [ False for _ in _ids ]
+
+    # group the _ids to detach by user
+    pulls = defaultdict(lambda: defaultdict(list))
+    for drink in drinks:
+      pulls[drink['user_email']]['drink_ids'].append(drink['_id'])
+    reviews = []
+    for review in self.client.reviews.find({ 'drink_id': { '$in': found } }, { 'user_email': 1 }):
+      pulls[review['user_email']]['review_ids'].append(review['_id'])
+      reviews.append(review['_id'])
+    for user in self.client.users.find({ 'favorite_ids': { '$in': found } }, { 'email': 1 }):
+      pulls[user['email']]['favorite_ids'] = found
+
+    # delete every review of the drinks
+    self.client.reviews.delete_many({ 'drink_id': { '$in': found } })
+
+    # detach from creators, reviewers, and everyone who favorited them
+    ops = [ UpdateOne({ 'email': email }, { '$pullAll': dict(fields) }) for email, fields in pulls.items() ]
+    self.client.users.bulk_write(ops, ordered = False)
+
+    # delete the drinks
+    self.client.drinks.delete_many({ '_id': { '$in': found } })
+    self.client.similar_drinks.delete_many({ '_id': { '$in': found } })
+
+    self._invalidate('drinks', *found)
+    self._invalidate('reviews', *reviews)
+    self.sampler.discard('drinks', *found)
+    self.sampler.discard('reviews', *reviews)
+    for review_id in reviews:
+      events.publish('reviews', 'delete', review_id)
+    for drink_id in found:
+      events.publish('drinks', 'delete', drink_id)
+    self._invalidate('users', *pulls)
+
+    found = set(found)
+    return [ _id in found for _id in _ids ]
+
+  # endregion
+
+  # region Read-only documents
+  # Read endpoints use these to skip building models: projected documents go straight from
+  # the cursor (or cache) to the serializer. Documents may be shared with the cache, so they
+  # must never be mutated. Write paths use the model methods above.
+
+  def getUserDoc(self, email: str, fields: list[str] = None, include: list[str] = None) -> dict or None:
+    """Gets a User's document by email. The password hash is never returned.
 
       Arguments:
-        - size { int }: the number of random drinks to be retrieved
+        - email { str }
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+        - include { list[str], optional }: related items to embed, each `name` or `name:limit`,
+          see `RELATIONS`. Defaults to None
 
       Raises:
-        - `ValueError`: Raised if size is not a non-zero positive integer.
-      
+        - `ValueError`: if fields contains a field users don't have or include is invalid
+
+      Returns:
+        - `dict` or `None`: the document if the user exists. `None` otherwise.
+    """
+    return self._getDoc('users', 'email', email, fields, include)
+
+  def getDrinkDoc(self, _id: ObjectId, fields: list[str] = None, include: list[str] = None) -> dict or None:
+    """Gets a Drink's document by _id.
+
+      Arguments:
+        - _id { ObjectId }
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+        - include { list[str], optional }: related items to embed, each `name` or `name:limit`,
+          see `RELATIONS`. Defaults to None
+
+      Raises:
+        - `ValueError`: if fields contains a field drinks don't have or include is invalid
+
       Returns:
-        - `list[Drink]`: A list of random drinks.
+        - `dict` or `None`: the document if the Drink exists. `None` otherwise.
+    """
+    return self._getDoc('drinks', '_id', _id, fields, include)
+
+  def getReviewDoc(self, _id: ObjectId, fields: list[str] = None, include: list[str] = None) -> dict or None:
+    """Gets a Review's document by _id.
+
+      Arguments:
+        - _id { ObjectId }
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+        - include { list[str], optional }: related items to embed, each `name` or `name:limit`,
+          see `RELATIONS`. Defaults to None
+
+      Raises:
+        - `ValueError`: if fields contains a field reviews don't have or include is invalid
+
+      Returns:
+        - `dict` or `None`: the document if the Review exists. `None` otherwise.
+    """
+    return self._getDoc('reviews', '_id', _id, fields, include)
+
+  def iterUsers(self, emails: list[str], fields: list[str] = None):
+    """Lazily gets many users by email in a single query. The password hash is never returned.
+
+      Arguments:
+        - emails { list[str] }
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if fields contains a field users don't have
+
+      Yields:
+        - `dict` or `None`: in the same order as `emails`
+    """
+    projection = self._projection('users', fields)
+    return self._iterMany('users', 'email', emails, projection = projection)
+
+  def iterDrinks(self, _ids: list[ObjectId], fields: list[str] = None):
+    """Lazily gets many drinks by _id in a single query.
+
+      Arguments:
+        - _ids { list[ObjectId] }
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if fields contains a field drinks don't have
+
+      Yields:
+        - `dict` or `None`: in the same order as `_ids`
+    """
+    projection = self._projection('drinks', fields)
+    return self._iterMany('drinks', '_id', _ids, projection = projection)
+
+  def iterReviews(self, _ids: list[ObjectId], fields: list[str] = None):
+    """Lazily gets many reviews by _id in a single query.
+
+      Arguments:
+        - _ids { list[ObjectId] }
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if fields contains a field reviews don't have
+
+      Yields:
+        - `dict` or `None`: in the same order as `_ids`
+    """
+    projection = self._projection('reviews', fields)
+    return self._iterMany('reviews', '_id', _ids, projection = projection)
+
+  def iterSample(self, type: str, size: int, fields: list[str] = None):
+    """Lazily returns the documents of size random items of 'type' from the database. Items
+      are drawn from the sample pool when it's warm, and by `$sample` otherwise.
+
+      Arguments:
+        - type { str }: Must be one of ['drink', 'review']
+        - size { int }: the number of random items to be retrieved
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: Raised if size is not a non-zero positive integer or fields contains
+          a field the items don't have.
+
+      Yields:
+        - `dict`
     """
     if size < 0:
       raise ValueError("Parameter `size` must be a positive non-zero integer.")
 
-    res = self.client.drinks.aggregate([{ "$sample": { "size": size } }])
-    return [ self.toDrink(drink) for drink in res ]
+    collection = f"{type}s"
+    projection = self._projection(collection, fields)
+    ids = self.sampler.sample(self.client, collection, size)
+    if ids is None:
+      return self.client[collection].aggregate([
+        { "$sample": { "size": size } },
+        { "$project": projection }
+      ])
+
+    # items deleted by other workers since the last refresh are skipped
+    docs = self._iterMany(collection, '_id', ids, projection = projection)
+    return (doc for doc in docs if doc is not None)
+
+  def pageItems(
+    self, type: str, email: str, limit: int = None, after: str = None, sort: str = '_id',
+    fields: list[str] = None
+  ) -> tuple[list[dict], str or None]:
+    """Returns a page of the items of 'type' of this user. Drinks and reviews are found by their
+      `user_email` so the user's `*_ids` arrays are never loaded.
+
+      Arguments:
+        - type { str }: Must be one of ['drink', 'review', 'favorite']
+        - email { str }
+        - limit { int, optional }: max items in the page. Defaults to None for all
+        - after { str, optional }: continuation token of the previous page. Defaults to None
+        - sort { str, optional }: field to sort by, prefixed with `-` for descending.
+          Defaults to '_id'
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if type is not one of ['drink', 'favorite', 'review'], `after` is
+          malformed, or fields contains a field the items don't have
+        - `KeyError`: if User with the given email DNE
+
+      Returns:
+        - `tuple[list[dict], str or None]`: the documents and the token of the next page, `None`
+          if there is no next page.
+    """
+    if type not in User.types:
+      raise ValueError(f"`type` must be one of {User.types}")
+
+    if type == 'favorite':
+      # grab ObjectIds
+      qres = self.client.users.find_one({ 'email': email }, { "_id": 0, "favorite_ids": 1 })
+      if qres is None:
+        raise KeyError(f"User with email {email} DNE")
+      query = { '_id': { '$in': qres['favorite_ids'] } }
+      # set type to align with collections
+      type = 'drink'
+    else:
+      query = { 'user_email': email }
+
+    collection = f"{type}s"
+    projection = self._projection(collection, fields)
+    docs, token = paginate(self.client[collection], query, parseSort(sort), limit, after, projection)
+
+    # an empty first page might mean the user DNE
+    if not len(docs) and after is None and query.get('user_email') == email:
+      if not self.client.users.count_documents({ 'email': email }, limit = 1):
+        raise KeyError(f"User with email {email} DNE")
+
+    return (docs, token)
+
+  def pageDrinkReviews(
+    self, drink_id: ObjectId, limit: int = None, after: str = None, sort: str = '_id',
+    fields: list[str] = None
+  ) -> tuple[list[dict], str or None]:
+    """Returns a page of the reviews attached to this drink.
+
+      Arguments:
+        - drink_id { ObjectId }
+        - limit { int, optional }: max reviews in the page. Defaults to None for all
+        - after { str, optional }: continuation token of the previous page. Defaults to None
+        - sort { str, optional }: field to sort by, prefixed with `-` for descending.
+          Defaults to '_id'
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if `after` is malformed or fields contains a field reviews don't have
+        - `KeyError`: if Drink with the given drink_id DNE
+
+      Returns:
+        - `tuple[list[dict], str or None]`: the documents and the token of the next page, `None`
+          if there is no next page.
+    """
+    projection = self._projection('reviews', fields)
+    docs, token = paginate(
+      self.client.reviews, { 'drink_id': drink_id }, parseSort(sort), limit, after, projection
+    )
+
+    # an empty first page might mean the drink DNE
+    if not len(docs) and after is None:
+      if not self.client.drinks.count_documents({ '_id': drink_id }, limit = 1):
+        raise KeyError(f"Drink with drink_id {drink_id} DNE")
+
+    return (docs, token)
+
+  def iterItems(self, type: str, email: str, sort: str = '_id', fields: list[str] = None):
+    """Lazy version of `pageItems` that streams every item of 'type' created by this user.
+
+      Arguments:
+        - type { str }: Must be one of ['drink', 'review', 'favorite']
+        - email { str }
+        - sort { str, optional }: field to sort by, prefixed with `-` for descending.
+          Defaults to '_id'
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if type is not one of ['drink', 'favorite', 'review'] or fields
+          contains a field the items don't have
+        - `KeyError`: if User with the given email DNE
+
+      Yields:
+        - `dict`
+    """
+    if type not in User.types:
+      raise ValueError(f"`type` must be one of {User.types}")
+
+    # checked up front since nothing can be reported once streaming starts
+    qres = self.client.users.find_one({ 'email': email }, { "_id": 0, "favorite_ids": 1 })
+    if qres is None:
+      raise KeyError(f"User with email {email} DNE")
+
+    if type == 'favorite':
+      query = { '_id': { '$in': qres['favorite_ids'] } }
+      type = 'drink'
+    else:
+      query = { 'user_email': email }
+
+    collection = f"{type}s"
+    projection = self._projection(collection, fields)
+    return self.client[collection].find(query, projection).sort(parseSort(sort))
+
+  def pageRanking(
+    self, board: str, limit: int = None, after: str = None, fields: list[str] = None
+  ) -> tuple[list[dict], str or None]:
+    """Gets a page of a leaderboard of drinks. `top` ranks drinks by rating and `trending` by
+      their ratings decayed over time, see `_trendTerm`. Both are kept up to date as reviews
+      change, so a page is a single indexed query.
+
+      Arguments:
+        - board { str }: Must be one of ['top', 'trending']
+        - limit { int, optional }: max drinks in the page. Defaults to None for all
+        - after { str, optional }: continuation token of the previous page. Defaults to None
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if board is not one of ['top', 'trending'], `after` is malformed, or
+          fields contains a field drinks don't have
+
+      Returns:
+        - `tuple[list[dict], str or None]`: the documents and the token of the next page, `None`
+          if there is no next page.
+    """
+    if board not in RANKINGS:
+      raise ValueError(f"`board` must be one of {list(RANKINGS)}")
+
+    sort, query = RANKINGS[board]
+    projection = self._projection('drinks', fields)
+    return paginate(self.client.drinks, query, parseSort(sort), limit, after, projection)
+
+  def searchText(self, q: str, types: list[str] = None, limit: int = 20) -> list[dict]:
+    """Full-text search over the names and descriptions of drinks and the comments of reviews,
+      with the backend chosen by `SEARCH_BACKEND`, see `db.search`.
+
+      Arguments:
+        - q { str }: the query
+        - types { list[str], optional }: any of ['drink', 'review']. Defaults to None for both
+        - limit { int, optional }: max hits. Defaults to 20
+
+      Raises:
+        - `ValueError`: if q has no searchable terms or types is invalid
+
+      Returns:
+        - `list[dict]`: hits, best first, each with the `type` and `score` of the match, the
+          matched document as `item`, and the matched text fields with the terms wrapped in
+          `<em>` tags as `highlights`
+    """
+    types = [ 'drink', 'review' ] if not types else types
+    invalid = [ type for type in types if f"{type}s" not in TEXT_FIELDS ]
+    if len(invalid):
+      raise ValueError(f"Invalid types {invalid}; must be among ['drink', 'review']")
+    terms = set(tokenize(q))
+    if not len(terms):
+      raise ValueError("Query has no searchable terms")
+
+    matches = self.searcher.search(self.client, q, [ f"{type}s" for type in types ], limit)
+
+    # read the matched documents through the cache, one query per collection
+    docs = {}
+    for collection in TEXT_FIELDS:
+      _ids = [ _id for _, c, _id in matches if c == collection ]
+      found = self._iterMany(collection, '_id', _ids, projection = READ_PROJECTIONS[collection])
+      docs[collection] = dict(zip(_ids, found))
+
+    res = []
+    for score, collection, _id in matches:
+      doc = docs[collection].get(_id)
+      # deleted since it was indexed
+      if doc is None:
+        continue
+
+      highlights = { field: highlight(doc.get(field), terms) for field in TEXT_FIELDS[collection] }
+      res.append({
+        'type': collection[:-1],
+        'score': score,
+        'item': doc,
+        'highlights': { k: v for k, v in highlights.items() if v is not None }
+      })
+    return res
+
+  def similarDrinks(self, _id: ObjectId, limit: int = 10, fields: list[str] = None) -> list[dict]:
+    """Gets the drinks whose ingredients are most similar to this drink's, by the cosine
+      similarity of their `ingredient_keys`. The neighbors are precomputed offline by
+      `db.similar`, drinks it hasn't seen yet are scored with a single aggregation.
+
+      Arguments:
+        - _id { ObjectId }
+        - limit { int, optional }: max drinks. Defaults to 10
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if fields contains a field drinks don't have
+        - `KeyError`: if Drink with the given _id DNE
+
+      Returns:
+        - `list[dict]`: the documents, most similar first, each with its `similarity` in (0, 1]
+    """
+    projection = self._projection('drinks', fields)
+    stored = self.client.similar_drinks.find_one({ '_id': _id }, { 'neighbor_ids': 1, 'scores': 1 })
+    if stored is not None:
+      similar = list(zip(stored['scores'], stored['neighbor_ids']))[:limit]
+    else:
+      # created or changed since the last `python -m db.similar`
+      doc = self.client.drinks.find_one({ '_id': _id }, { 'ingredient_keys': 1 })
+      if doc is None:
+        raise KeyError(f"Drink with _id {_id} DNE")
+      similar = similarTo(self.client, _id, doc.get('ingredient_keys') or [], limit)
+
+    docs = self._iterMany('drinks', '_id', [ other for _, other in similar ], projection = projection)
+    # drinks deleted since the build are None. Cached documents are shared, so the score goes
+    # on a copy
+    return [ dict(doc, similarity = score) for (score, _), doc in zip(similar, docs) if doc is not None ]
+
+  def userFeed(self, email: str, limit: int = 20, fields: list[str] = None) -> list[dict]:
+    """Gets the personalized feed of a user: drinks similar to the ones they rated highly or
+      favorited, by the item-item model of `db.feed`. Feeds are computed offline and cached
+      per user, so this never scores anything. Users without a feed yet, or with a shorter one
+      than limit, are topped up with random drinks.
+
+      Arguments:
+        - email { str }
+        - limit { int, optional }: max drinks. Defaults to 20
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if fields contains a field drinks don't have
+        - `KeyError`: if User with the given email DNE
+
+      Returns:
+        - `list[dict]`: the documents, best first, each with its `score`. Random drinks have
+          a `score` of `None`.
+    """
+    projection = self._projection('drinks', fields)
+    user = self._cached('users', 'email', email)
+    if user is None:
+      raise KeyError(f"User with email `{email}` DNE")
+
+    feed = self.cache.get(f"feeds:{email}")
+    if feed is None:
+      token = self.cache.token(f"feeds:{email}")
+      feed = self.client.feeds.find_one({ '_id': email }, { 'drink_ids': 1, 'scores': 1 })
+      feed = feed or { '_id': email, 'drink_ids': [], 'scores': [] }
+      self.cache.set(f"feeds:{email}", feed, token)
+
+    # drinks favorited since the feed was computed
+    seen = set(user.get('favorite_ids') or [])
+    picks = [ (score, _id) for _id, score in zip(feed['drink_ids'], feed['scores']) if _id not in seen ]
+    picks = picks[:limit]
+    docs = self._iterMany('drinks', '_id', [ _id for _, _id in picks ], projection = projection)
+    # cached documents are shared, so the score goes on a copy
+    res = [ dict(doc, score = score) for (score, _), doc in zip(picks, docs) if doc is not None ]
+
+    if len(res) < limit:
+      seen.update(_id for _, _id in picks)
+      extra = ( doc for doc in self.iterSample('drink', limit, fields) if doc['_id'] not in seen )
+      res += [ dict(doc, score = None) for doc in islice(extra, limit - len(res)) ]
+    return res
+
+  def suggestDrinks(self, prefix: str, limit: int = 10) -> list[dict]:
+    """Type-ahead for drink names, served from the in-memory index of `db.suggest`.
+
+      Arguments:
+        - prefix { str }: start of any word of the name, case insensitive
+        - limit { int, optional }: max drinks. Defaults to 10
+
+      Returns:
+        - `list[dict]`: the `_id`, `name`, and `rating` of each drink, best rated first
+    """
+    return self.suggester.suggest(self.client, prefix, limit)
+
+  def searchDrinks(
+    self, ingredients: list[str], match: str = 'all', limit: int = None, after: str = None,
+    fields: list[str] = None
+  ) -> tuple[list[dict], str or None]:
+    """Gets a page of the drinks made with the given ingredients through the multikey index on
+      `ingredient_keys`. Drinks matching more of the ingredients come first, then better rated
+      drinks. Every document carries the number of ingredients it matched as `matches`.
+
+      Arguments:
+        - ingredients { list[str] }: names of the ingredients
+        - match { str, optional }: 'all' for drinks with every ingredient, 'any' for drinks
+          with at least one. Defaults to 'all'
+        - limit { int, optional }: max drinks in the page. Defaults to None for all
+        - after { str, optional }: continuation token of the previous page. Defaults to None
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if no ingredient is given, match is not one of ['all', 'any'], `after`
+          is malformed, or fields contains a field drinks don't have
+
+      Returns:
+        - `tuple[list[dict], str or None]`: the documents and the token of the next page, `None`
+          if there is no next page.
+    """
+    if match not in MATCHES:
+      raise ValueError(f"`match` must be one of {list(MATCHES)}")
+    keys = ingredientKeys(ingredients)
+    if not len(keys):
+      raise ValueError("At least one ingredient is required")
+
+    pipeline = [
+      { '$match': { 'ingredient_keys': { MATCHES[match]: keys } } },
+      { '$addFields': { 'matches': { '$size': { '$setIntersection': [ '$ingredient_keys', keys ] } } } }
+    ]
+    sort = [ ('matches', -1), ('rating', -1), ('_id', -1) ]
+    projection = self._projection('drinks', fields)
+    return paginatePipeline(self.client.drinks, pipeline, sort, limit, after, projection)
+
+  def backfillIngredientKeys(self) -> int:
+    """Indexes the ingredients of drinks created before `ingredient_keys` existed.
+
+      Returns:
+        - `int`: the number of drinks updated
+    """
+    query = { 'ingredient_keys': { '$exists': False } }
+    updates = [
+      UpdateOne({ '_id': doc['_id'] }, { '$set': { 'ingredient_keys': ingredientKeys(doc.get('ingredients')) } })
+      for doc in self.client.drinks.find(query, { 'ingredients': 1 })
+    ]
+    if not len(updates):
+      return 0
+    return self.client.drinks.bulk_write(updates, ordered = False).modified_count
+
+  def backfillTrends(self) -> int:
+    """Recomputes the `trend` of every drink from its reviews, e.g. for drinks whose `trend`
+      was stored before it was kept in log space.
+
+      Returns:
+        - `int`: the number of drinks updated
+    """
+    terms = defaultdict(list)
+    for doc in self.client.reviews.find({}, { 'drink_id': 1, 'rating': 1, 'date': 1 }):
+      terms[doc['drink_id']].append(self._trendTerm(doc.get('rating') or 0, doc.get('date')))
+
+    updates = []
+    for doc in self.client.drinks.find({}, { '_id': 1 }):
+      trend = self._trendSum(terms.get(doc['_id'], []))
+      if trend is not None and trend[0] > 0:
+        updates.append(UpdateOne({ '_id': doc['_id'] }, { '$set': { 'trend': trend[1] } }))
+      else:
+        updates.append(UpdateOne({ '_id': doc['_id'] }, { '$unset': { 'trend': '' } }))
+    if not len(updates):
+      return 0
+    return self.client.drinks.bulk_write(updates, ordered = False).modified_count
+
+  def iterRanking(self, board: str, fields: list[str] = None):
+    """Lazy version of `pageRanking` that streams the whole leaderboard.
+
+      Arguments:
+        - board { str }: Must be one of ['top', 'trending']
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if board is not one of ['top', 'trending'] or fields contains a field
+          drinks don't have
+
+      Yields:
+        - `dict`
+    """
+    if board not in RANKINGS:
+      raise ValueError(f"`board` must be one of {list(RANKINGS)}")
+
+    sort, query = RANKINGS[board]
+    projection = self._projection('drinks', fields)
+    return self.client.drinks.find(query, projection).sort(parseSort(sort))
+
+  def iterDrinkReviews(self, drink_id: ObjectId, sort: str = '_id', fields: list[str] = None):
+    """Lazy version of `pageDrinkReviews` that streams every review of this drink.
+
+      Arguments:
+        - drink_id { ObjectId }
+        - sort { str, optional }: field to sort by, prefixed with `-` for descending.
+          Defaults to '_id'
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+
+      Raises:
+        - `ValueError`: if fields contains a field reviews don't have
+        - `KeyError`: if Drink with the given drink_id DNE
+
+      Yields:
+        - `dict`
+    """
+    projection = self._projection('reviews', fields)
+
+    # checked up front since nothing can be reported once streaming starts
+    if not self.client.drinks.count_documents({ '_id': drink_id }, limit = 1):
+      raise KeyError(f"Drink with drink_id {drink_id} DNE")
+
+    query = { 'drink_id': drink_id }
+    return self.client.reviews.find(query, projection).sort(parseSort(sort))
 
   # endregion
 
   # region internal functions
 
+  def _insertOnce(self, collection: str, key: dict, doc: dict) -> tuple[dict, bool]:
+    """Inserts doc unless a document matching key exists, in a single round trip. Relies on a
+      unique index over key's fields so concurrent inserts can't create duplicates.
+
+      Arguments:
+        - collection { str }: name of the collection to insert into
+        - key { dict }: equality filter that identifies the document
+        - doc { dict }: the document to insert
+
+      Returns:
+        - `tuple[dict, bool]`: the stored document and whether it was inserted by this call.
+    """
+    # pick the _id up front so we can tell if the upsert inserted
+    _id = ObjectId()
+    fields = { k: v for k, v in doc.items() if k not in key }
+    fields['_id'] = _id
+
+    try:
+      res = self.client[collection].find_one_and_update(
+        key, { '$setOnInsert': fields }, upsert = True,
+        return_document = ReturnDocument.AFTER
+      )
+    except DuplicateKeyError:
+      # a concurrent request inserted it first
+      res = self.client[collection].find_one(key)
+
+    return (res, res['_id'] == _id)
+
+  def _insertMany(self, collection: str, keys: list[str], docs: list[dict]) -> list[tuple[dict, bool]]:
+    """Bulk version of `_insertOnce`: inserts docs with a single unordered `insert_many`. Docs
+      matching a stored document on keys are rejected by the unique index over keys, and the
+      stored document is returned in their place.
+
+      Arguments:
+        - collection { str }: name of the collection to insert into
+        - keys { list[str] }: fields that identify a document
+        - docs { list[dict] }: the documents to insert, given an `_id` by this call
+
+      Returns:
+        - `list[tuple[dict, bool]]`: for each doc, the stored document and whether it was
+          inserted by this call. The document is `None` if it failed for another reason.
+    """
+    if not len(docs):
+      return []
+
+    for doc in docs:
+      doc['_id'] = ObjectId()
+
+    duplicates = set()
+    failed = set()
+    try:
+      self.client[collection].insert_many(docs, ordered = False)
+    except BulkWriteError as e:
+      for error in e.details['writeErrors']:
+        (duplicates if error['code'] == DUPLICATE_KEY else failed).add(error['index'])
+    if not len(duplicates) and not len(failed):
+      return [ (doc, True) for doc in docs ]
+
+    # grab the documents that were there first
+    existing = {}
+    if len(duplicates):
+      query = { '$or': [ { k: docs[i][k] for k in keys } for i in duplicates ] }
+      for doc in self.client[collection].find(query):
+        existing[tuple(doc[k] for k in keys)] = doc
+
+    res = []
+    for i, doc in enumerate(docs):
+      if i in duplicates:
+        res.append((existing.get(tuple(doc[k] for k in keys)), False))
+      else:
+        res.append((None, False) if i in failed else (doc, True))
+    return res
+
+  def _cached(self, collection: str, key: str, value) -> dict or None:
+    """Read-through lookup of a single document by a unique key.
+
+      Arguments:
+        - collection { str }: name of the collection to query
+        - key { str }: unique field to match on
+        - value: the value of key
+
+      Returns:
+        - `dict` or `None`: the document if it exists. `None` otherwise.
+    """
+    doc = self.cache.get(f"{collection}:{value}")
+    if doc is None:
+      # taken before the read so a change racing it keeps doc out of the cache
+      token = self.cache.token(f"{collection}:{value}")
+      doc = self.client[collection].find_one({ key: value }, PROJECTIONS[collection])
+      if doc is not None:
+        self.cache.set(f"{collection}:{value}", doc, token)
+    return doc
+
+  def _projection(self, collection: str, fields: list[str] = None) -> dict:
+    """Translates the fields requested by a client into a projection for collection.
+
+      Arguments:
+        - collection { str }: name of the collection
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+          read endpoints return, as does an empty list (e.g. `?fields=`)
+
+      Raises:
+        - `ValueError`: if fields contains a field that can't be returned
+
+      Returns:
+        - `dict`: the projection, never empty. `_id` is always included and hidden fields
+          never are.
+    """
+    allowed = READ_PROJECTIONS[collection]
+    # an empty projection means every field to MongoDB, hidden ones included
+    if not fields:
+      return allowed
+
+    invalid = [ field for field in fields if field != '_id' and field not in allowed ]
+    if len(invalid):
+      raise ValueError(f"Invalid fields {invalid}; must be among {list(allowed)}")
+    return { field: 1 for field in fields }
+
+  def _lookups(self, collection: str, include: list[str]) -> tuple[list[str], list[dict]]:
+    """Translates the related items requested by a client into `$lookup` stages. Each relation
+      is capped at its own limit so a popular drink can't embed every review it has.
+
+      Arguments:
+        - collection { str }: name of the collection being read
+        - include { list[str] }: each `name` or `name:limit`, where name is a key of
+          `RELATIONS[collection]` and limit defaults to `INCLUDE_LIMIT`
+
+      Raises:
+        - `ValueError`: if a name isn't a relation of collection or a limit isn't between 1 and
+          `INCLUDE_MAX`
+
+      Returns:
+        - `tuple[list[str], list[dict]]`: the names of the embedded fields and the stages that
+          embed them
+    """
+    relations = RELATIONS[collection]
+    names, stages = [], []
+    for item in include:
+      name, _, limit = item.partition(':')
+      if name not in relations:
+        raise ValueError(f"Invalid include {name}; must be among {list(relations)}")
+      try:
+        limit = int(limit) if limit else INCLUDE_LIMIT
+      except ValueError:
+        limit = 0
+      if not 0 < limit <= INCLUDE_MAX:
+        raise ValueError(f"Limit of include {name} must be between 1 and {INCLUDE_MAX}")
+
+      target, local, foreign, many = relations[name]
+      stages.append({ '$lookup': {
+        'from': target,
+        'localField': local,
+        'foreignField': foreign,
+        'pipeline': [
+          { '$sort': { '_id': 1 } },
+          { '$limit': limit if many else 1 },
+          { '$project': READ_PROJECTIONS[target] }
+        ],
+        'as': name
+      } })
+      if not many:
+        stages.append({ '$set': { name: { '$ifNull': [ { '$arrayElemAt': [ f"${name}", 0 ] }, None ] } } })
+      names.append(name)
+
+    return (names, stages)
+
+  def _project(self, collection: str, doc: dict, projection: dict) -> dict:
+    """Applies projection to a full document, e.g. one served by the cache.
+
+      Arguments:
+        - collection { str }: name of the collection
+        - doc { dict }: a document read with `PROJECTIONS[collection]`
+        - projection { dict }: see `_projection`
+
+      Returns:
+        - `dict`: doc itself if nothing is left out, a new dict otherwise.
+    """
+    if projection is PROJECTIONS[collection]:
+      return doc
+    hidden = HIDDEN.get(collection, ())
+    return { k: v for k, v in doc.items() if k == '_id' or (k in projection and k not in hidden) }
+
+  def _getDoc(
+    self, collection: str, key: str, value, fields: list[str] = None, include: list[str] = None
+  ) -> dict or None:
+    """Read-through lookup of a single document for a read endpoint.
+
+      Arguments:
+        - collection { str }: name of the collection to query
+        - key { str }: unique field to match on
+        - value: the value of key
+        - fields { list[str], optional }: fields to return. Defaults to None for every field
+        - include { list[str], optional }: see `_lookups`. Defaults to None
+
+      Raises:
+        - `ValueError`: if fields contains a field that can't be returned or include is invalid
+
+      Returns:
+        - `dict` or `None`: the projected document if it exists. `None` otherwise.
+    """
+    projection = self._projection(collection, fields)
+
+    # related items are joined by the server in the same round trip
+    if include:
+      names, stages = self._lookups(collection, include)
+      pipeline = [
+        { '$match': { key: value } },
+        { '$limit': 1 },
+        *stages,
+        { '$project': dict(projection, **{ name: 1 for name in names }) }
+      ]
+      return next(self.client[collection].aggregate(pipeline), None)
+
+    # narrow reads skip a cache miss so less data crosses the wire
+    if projection is not READ_PROJECTIONS[collection] and self.cache.get(f"{collection}:{value}") is None:
+      return self.client[collection].find_one({ key: value }, projection)
+
+    doc = self._cached(collection, key, value)
+    return None if doc is None else self._project(collection, doc, projection)
+
+  def _invalidate(self, collection: str, *values) -> None:
+    """Drops the cached documents of collection keyed by values. Must be called by every
+      method that changes a document so reads never return stale data.
+
+      Arguments:
+        - collection { str }: name of the collection
+        - values: the unique keys of the changed documents
+    """
+    self.cache.delete(*[ f"{collection}:{v}" for v in values ])
+
+  def _iterMany(self, collection: str, key: str, values: list, projection: dict = None):
+    """Fetches every document whose `key` is in `values` with one `$in` query. Cached
+      documents are served without touching the database. Documents are yielded as soon as
+      every document before them in `values` has arrived, and only out of order documents are
+      held in memory.
+
+      Arguments:
+        - collection { str }: name of the collection to query
+        - key { str }: unique field to match on
+        - values { list }
+        - projection { dict, optional }: applied to the yielded documents, see `_projection`.
+          Defaults to None for `PROJECTIONS[collection]`
+
+      Yields:
+        - `dict` or `None`: in the same order as `values`, `None` for the missing ones.
+    """
+    if not len(values):
+      return
+
+    # only full documents are cached, narrower ones are fetched as is
+    full = projection is None or projection is READ_PROJECTIONS[collection]
+    projection = PROJECTIONS[collection] if projection is None else projection
+
+    # how many more times each document is needed
+    needed = Counter(values)
+    found = {}
+    i = 0
+
+    # serve what we can from the cache
+    missing = []
+    keys = list(needed)
+    for v, doc in zip(keys, self.cache.getMany([ f"{collection}:{v}" for v in keys ])):
+      if doc is None:
+        missing.append(v)
+      else:
+        found[v] = doc
+    while i < len(values) and values[i] in found:
+      yield self._project(collection, self._release(found, needed, values[i]), projection)
+      i += 1
+
+    query = { key: { '$in': missing } }
+    fetch = PROJECTIONS[collection] if full else dict(projection, **{ key: 1 })
+    # taken before the read so a change racing it keeps the document out of the cache
+    tokens = dict(zip(missing, self.cache.tokens([ f"{collection}:{v}" for v in missing ]))) if full else {}
+    cursor = self.client[collection].find(query, fetch) if len(missing) else []
+    for doc in cursor:
+      if full:
+        self.cache.set(f"{collection}:{doc[key]}", doc, tokens.get(doc[key], -1))
+      found[doc[key]] = doc
+      # flush everything that's ready
+      while i < len(values) and values[i] in found:
+        yield self._project(collection, self._release(found, needed, values[i]), projection)
+        i += 1
+
+    # whatever is left DNE or is a repeat
+    for v in values[i:]:
+      yield self._project(collection, self._release(found, needed, v), projection) if v in found else None
+
+  def _release(self, found: dict, needed: Counter, value) -> dict:
+    """Takes a document out of the reorder buffer of `_iterMany`, dropping it once no
+      later value needs it.
+    """
+    doc = found[value]
+    needed[value] -= 1
+    if not needed[value]:
+      del found[value]
+    return doc
+
   def toUser(self, doc: dict) -> User:
     """Converts a MongoDB document to a User.
 
@@ -394,6 +1567,7 @@ class DBdriver:
     res = User(doc['fname'], doc['lname'], doc['email'], doc['pw'])
     # set User _id
     res._id = doc['_id']
+    res.ver = doc.get('ver', 0)
     # set the containers of _ids
     for type in User.types:
       setattr(res, type + '_ids', set(doc[type + '_ids']))
@@ -432,65 +1606,156 @@ class DBdriver:
     for k, v in doc.items():
       setattr(res, k, v)
     res.review_ids = set(doc["review_ids"])
+    res.count = doc.get("count", len(res.review_ids))
     return res
 
   def attachReview(
-    self, drink_id: ObjectId, review_id: ObjectId, rating: int
+    self, drink_id: ObjectId, review_id: ObjectId, rating: int, date: datetime = None
   ):
-    """Attach a review to the drink specified by _id.
+    """Attach a review to the drink specified by _id and fold its rating into the drink
+      with a single atomic update. Attaching an already attached review is a no-op.
 
       Arguments:
         - drink_id { ObjectId }
         - review_id { ObjectId }
-        - drink_hint { Drink, optional }: Providing a Drink for hint will prevent
-          getting the Drink from the database. Defaults to None.
-        - review_hint { Review, optional }: Providing a Review for hint will prevent
-          getting the Review from the database. Defaults to None.
+        - rating { int }: the rating of the review
+        - date { datetime, optional }: when the review was made. Defaults to None for now
 
       Raises:
         - `KeyError`: raised if Drink with the given _id DNE.
     """
     # attempt to update db
-    drink = self.client.drinks.find_one_and_update(
-      { '_id': drink_id },
-      { '$addToSet': { 'review_ids': review_id } },
-      return_document = ReturnDocument.AFTER
+    res = self.client.drinks.update_one(
+      { '_id': drink_id, 'review_ids': { '$ne': review_id } },
+      self._ratingUpdate(
+        rating, 1, { '$concatArrays': [ '$review_ids', [ review_id ] ] },
+        self._trendTerm(rating, date)
+      )
     )
+    self._invalidate('drinks', drink_id)
 
-    if not drink:
+    if not res.matched_count and not self.client.drinks.count_documents({ '_id': drink_id }, limit = 1):
       raise KeyError(f"Drink with _id {drink_id} DNE")
-    
-    # update the local drink
-    drink = self.toDrink(drink)
-    drink.update_rating(rating)
-    self.updateDrink(drink_id, { 'rating': drink.rating, "sum": drink.sum })
 
-  def detachReview(self, drink_id: ObjectId, review_id: ObjectId, rating: int):
-    """Detaches the review with the associated _id from this drink.
+  def detachReview(
+    self, drink_id: ObjectId, review_id: ObjectId, rating: int, date: datetime = None
+  ):
+    """Detaches the review with the associated _id from this drink and removes its rating
+      with a single atomic update. Detaching a review that isn't attached is a no-op.
 
       Arguments:
         - drink_id { ObjectId }
         - review_id: { ObjectId }
-        - hint { Drink, optional }: Providing a User for hint will prevent getting the User
-          from the database. Defaults to None.
+        - rating { int }: the rating of the review
+        - date { datetime, optional }: when the review was made. Defaults to None for now
 
       Raises:
-        - `KeyError`: raised if User with the given email (email param or hint.email) DNE.
+        - `KeyError`: raised if Drink with the given _id DNE.
     """
     # attempt to update db
-    drink = self.client.drinks.find_one_and_update(
-      { '_id': drink_id },
-      { '$pullAll': { "review_ids": [review_id] } },
-      return_document=ReturnDocument.AFTER
+    res = self.client.drinks.update_one(
+      { '_id': drink_id, 'review_ids': review_id },
+      self._ratingUpdate(-rating, -1, {
+        '$filter': { 'input': '$review_ids', 'cond': { '$ne': [ '$$this', review_id ] } }
+      }, self._trendTerm(-rating, date))
     )
+    self._invalidate('drinks', drink_id)
 
-    if not drink:
+    if not res.matched_count and not self.client.drinks.count_documents({ '_id': drink_id }, limit = 1):
       raise KeyError(f"Drink with drink_id {drink_id} DNE")
 
-    # update the local drink
-    drink = self.toDrink(drink)
-    drink.update_rating(-rating)
-    self.updateDrink(drink_id, { 'rating': drink.rating, "sum": drink.sum })
+  def _ratingUpdate(
+    self, sum_delta: float, count_delta: int, review_ids: dict = None,
+    trend_delta: tuple[int, float] = None
+  ) -> list:
+    """Builds an update pipeline that shifts a drink's `sum`, `count`, and `trend` and recomputes
+      its rating on the server, so concurrent reviews can't lose updates.
+
+      Arguments:
+        - sum_delta { float }: amount to add to the drink's `sum`
+        - count_delta { int }: amount to add to the drink's `count`
+        - review_ids { dict, optional }: expression for the new `review_ids`. Defaults to None
+        - trend_delta { tuple[int, float], optional }: term to add to the drink's `trend`, see
+          `_trendTerm`. Defaults to None for no change
+
+      Returns:
+        - `list`: the update pipeline
+    """
+    # drinks created before `count` existed fall back to the number of reviews
+    count = { '$ifNull': [ '$count', { '$size': '$review_ids' } ] }
+    counters = {
+      'sum': { '$add': [ '$sum', sum_delta ] },
+      'count': { '$add': [ count, count_delta ] }
+    }
+    if review_ids is not None:
+      counters['review_ids'] = review_ids
+    if trend_delta is not None:
+      # log2(2^trend + sign * 2^x), scaled by the larger exponent so neither power overflows
+      sign, x = trend_delta
+      total = { '$add': [
+        { '$ifNull': [ { '$pow': [ 2, { '$subtract': [ '$trend', '$$m' ] } ] }, 0 ] },
+        { '$multiply': [ sign, { '$pow': [ 2, { '$subtract': [ x, '$$m' ] } ] } ] }
+      ] }
+      counters['trend'] = { '$let': {
+        'vars': { 'm': { '$max': [ '$trend', x ] } },
+        'in': { '$let': {
+          'vars': { 'total': total },
+          'in': { '$cond': [
+            { '$gt': [ '$$total', 0 ] }, { '$add': [ '$$m', { '$log': [ '$$total', 2 ] } ] }, None
+          ] }
+        } }
+      } }
+
+    # rating is the avg rounded to the nearest .5, -1 for no reviews
+    rating = { '$cond': [
+      { '$gt': [ '$count', 0 ] },
+      { '$multiply': [ 0.5, { '$round': [ { '$divide': [ '$sum', { '$multiply': [ '$count', 0.5 ] } ] }, 0 ] } ] },
+      -1
+    ] }
+
+    # drop the rounding error left once every review is gone
+    trend = { '$cond': [
+      { '$and': [ { '$gt': [ '$count', 0 ] }, { '$in': [ { '$type': '$trend' }, NUMBER_TYPES ] } ] },
+      '$trend', '$$REMOVE'
+    ] }
+
+    return [ { '$set': counters }, { '$set': { 'rating': rating, 'trend': trend } } ]
+
+  def _trendTerm(self, rating: float, date: datetime = None) -> tuple[int, float] or None:
+    """Returns how much a rating made at date counts towards a drink's `trend`, in log space.
+      The weight of a rating doubles every `TREND_HALFLIFE`, which is equivalent to older
+      ratings decaying by half; its log2 only grows by one, so it never overflows.
+
+      Arguments:
+        - rating { float }: the rating, negative to take it back out
+        - date { datetime, optional }: when the rating was made. Defaults to None for now
+
+      Returns:
+        - `tuple[int, float]` or `None`: the sign of the term and the log2 of its magnitude,
+          `rating * 2 ** weeks`. `None` if rating is 0
+    """
+    if not rating:
+      return None
+    date = datetime.now() if date is None else date
+    return (1 if rating > 0 else -1, log2(abs(rating)) + (date - TREND_EPOCH) / TREND_HALFLIFE)
+
+  def _trendSum(self, terms: list) -> tuple[int, float] or None:
+    """Adds up terms from `_trendTerm` into a single term without leaving log space.
+
+      Arguments:
+        - terms { list[tuple[int, float] or None] }
+
+      Returns:
+        - `tuple[int, float]` or `None`: the sum, `None` if it is 0
+    """
+    terms = [ term for term in terms if term is not None ]
+    if not len(terms):
+      return None
+    m = max(x for _, x in terms)
+    total = sum(sign * 2 ** (x - m) for sign, x in terms)
+    if not total:
+      return None
+    return (1 if total > 0 else -1, m + log2(abs(total)))
 
   def attachItem(self, type: str, email: str, _id: ObjectId):
     """Attach an item to the User given the user's email and item's _id.
@@ -505,11 +1770,12 @@ class DBdriver:
     """
     # grab the user
 
-    # attempt to update db
-    res = self.client.users.find_one_and_update(
-      { 'email': email },
-      { '$addToSet': { f"{type}_ids": _id } }
-    )
+    # attempt to update db, reviews and favorites change the user's feed
+    update = { '$addToSet': { f"{type}_ids": _id } }
+    if type in FEED_ITEMS:
+      update['$set'] = { 'feed_dirty': True }
+    res = self.client.users.find_one_and_update({ 'email': email }, update)
+    self._invalidate('users', email)
     # check if update failed
     if not res:
       raise KeyError(f"User with email `{email}` DNE")
@@ -527,11 +1793,12 @@ class DBdriver:
       Raises:
          - `KeyError`: raised if User with the given email (email param or hint.email) DNE.
     """
-    # attempt to update db
-    res = self.client.users.find_one_and_update(
-      { 'email': email },
-      { '$pullAll': { f"{type}_ids": [_id] } }
-    )
+    # attempt to update db, reviews and favorites change the user's feed
+    update = { '$pullAll': { f"{type}_ids": [_id] } }
+    if type in FEED_ITEMS:
+      update['$set'] = { 'feed_dirty': True }
+    res = self.client.users.find_one_and_update({ 'email': email }, update)
+    self._invalidate('users', email)
     # check if update failed
     if not res:
       raise KeyError(f"User with email `{email}` DNE")
@@ -0,0 +1,51 @@
+from collections import defaultdict
+from threading import Lock
+from logging import getLogger
+
+log = getLogger(__name__)
+
+# collection -> functions called with (action, _id, doc)
+_subscribers = defaultdict(list)
+_lock = Lock()
+
+def subscribe(collection: str, fn) -> None:
+  """Calls fn after every change `DBdriver` makes to collection in this process. Used by
+    in-process indexes that must stay in step with the database.
+
+    Arguments:
+      - collection { str }: one of ['drinks', 'reviews']
+      - fn { function }: takes the action ('create', 'update', or 'delete'), the _id of the
+        changed document, and the document after the change, `None` for deletes
+  """
+  with _lock:
+    _subscribers[collection].append(fn)
+
+def unsubscribe(collection: str, fn) -> None:
+  """Stops calling fn, see `subscribe`.
+
+    Arguments:
+      - collection { str }
+      - fn { function }
+  """
+  with _lock:
+    if fn in _subscribers[collection]:
+      _subscribers[collection].remove(fn)
+
+def publish(collection: str, action: str, _id, doc: dict = None) -> None:
+  """Notifies the subscribers of collection of a change. A failing subscriber is logged and
+    never fails the change itself.
+
+    Arguments:
+      - collection { str }
+      - action { str }: one of ['create', 'update', 'delete']
+      - _id: _id of the changed document
+      - doc { dict, optional }: the document after the change. Defaults to None
+  """
+  with _lock:
+    subscribers = list(_subscribers[collection])
+
+  for fn in subscribers:
+    try:
+      fn(action, _id, doc)
+    except Exception:
+      log.exception("Subscriber of %s failed on %s", collection, action)
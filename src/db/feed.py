@@ -0,0 +1,254 @@
+from datetime import datetime
+from logging import getLogger
+import numpy as np
+from scipy import sparse
+from pymongo import ReplaceOne
+from pymongo.database import Database
+
+log = getLogger(__name__)
+
+# a review counts for its drink above this rating and against it below
+NEUTRAL_RATING = 2.5
+MAX_RATING = 5
+# a favorite counts like a top rating
+FAVORITE_WEIGHT = 1.0
+
+# bounds the scores held at once: block rows * drinks <= BLOCK_CELLS
+BLOCK_CELLS = 1 << 25
+# users whose feeds are computed and written together
+BATCH = 1000
+
+def train(db: Database, size: int = 50, k: int = 50) -> int:
+  """Retrains the item-item model from every review and favorite, then rewrites the feed of
+    every user. Users are rows and drinks are columns of a sparse matrix of their interactions,
+    two drinks are similar when the same users like them (cosine similarity of their columns),
+    and a user's feed is the drinks most similar to the ones they like that they haven't rated
+    or favorited yet. Everything is computed with sparse matrix products, a block at a time.
+
+    The neighbors of every drink are kept in `feed_neighbors` so `refresh` can recompute the
+    feeds of single users without retraining.
+
+    Arguments:
+      - db { Database }
+      - size { int, optional }: max drinks in a feed. Defaults to 50
+      - k { int, optional }: neighbors kept per drink. Defaults to 50
+
+    Returns:
+      - `int`: the number of feeds written
+  """
+  started = datetime.now()
+  # cleared first so users changed meanwhile are picked up by the next refresh
+  db.users.update_many({ 'feed_dirty': True }, { '$unset': { 'feed_dirty': '' } })
+
+  emails, drink_ids, values = _interactions(db)
+  rows = { email: row for row, email in enumerate(dict.fromkeys(emails)) }
+  cols = { _id: col for col, _id in enumerate(dict.fromkeys(drink_ids)) }
+  matrix = _matrix(emails, drink_ids, values, rows, cols)
+  neighbors = topNeighbors(matrix, k)
+
+  # store the model, then drop what's left of the previous one
+  ids = list(cols)
+  ops = []
+  for col, _id in enumerate(ids):
+    first, last = neighbors.indptr[col], neighbors.indptr[col + 1]
+    ops.append(ReplaceOne({ '_id': _id }, {
+      'neighbor_ids': [ ids[i] for i in neighbors.indices[first:last] ],
+      'scores': neighbors.data[first:last].tolist(),
+      'date': started
+    }, upsert = True))
+  writeMany(db.feed_neighbors, ops)
+  db.feed_neighbors.delete_many({ 'date': { '$lt': started } })
+
+  total = _writeFeeds(db, list(rows), ids, _feeds(matrix, neighbors, size), started)
+  # users who no longer like anything
+  db.feeds.delete_many({ 'date': { '$lt': started } })
+  log.info("Trained feeds of %d users over %d drinks", total, len(ids))
+  return total
+
+def refresh(db: Database, size: int = 50, k: int = 50) -> int:
+  """Recomputes the feeds of the users marked with `feed_dirty` by `DBdriver` since the last
+    run, with the neighbors stored by the last `train`. Drinks created since then are only
+    recommended after the next `train`. Trains from scratch if there is no model yet.
+
+    Arguments:
+      - db { Database }
+      - size { int, optional }: max drinks in a feed. Defaults to 50
+      - k { int, optional }: neighbors kept per drink if a model is trained. Defaults to 50
+
+    Returns:
+      - `int`: the number of feeds written
+  """
+  if db.feed_neighbors.find_one({}, { '_id': 1 }) is None:
+    return train(db, size, k)
+
+  cols, neighbors = _loadNeighbors(db)
+  ids = list(cols)
+  total = 0
+  while True:
+    batch = [ doc['email'] for doc in db.users.find({ 'feed_dirty': True }, { 'email': 1 }).limit(BATCH) ]
+    if not len(batch):
+      break
+
+    # cleared first so users changed meanwhile are marked again
+    db.users.update_many({ 'email': { '$in': batch } }, { '$unset': { 'feed_dirty': '' } })
+    rows = { email: row for row, email in enumerate(batch) }
+    matrix = _matrix(*_interactions(db, batch), rows, cols)
+    total += _writeFeeds(db, batch, ids, _feeds(matrix, neighbors, size), datetime.now())
+
+  log.info("Refreshed feeds of %d users", total)
+  return total
+
+def _interactions(db: Database, emails: list[str] = None) -> tuple[list, list, list]:
+  # (email, drink _id, value) of every favorite and review, in three lists
+  users, drinks, values = [], [], []
+  query = {} if emails is None else { 'email': { '$in': emails } }
+  for doc in db.users.find(query, { 'email': 1, 'favorite_ids': 1 }):
+    favorites = doc.get('favorite_ids') or []
+    users += [ doc['email'] ] * len(favorites)
+    drinks += favorites
+    values += [ FAVORITE_WEIGHT ] * len(favorites)
+
+  query = {} if emails is None else { 'user_email': { '$in': emails } }
+  for doc in db.reviews.find(query, { 'user_email': 1, 'drink_id': 1, 'rating': 1 }):
+    if doc.get('rating') is None:
+      continue
+    users.append(doc['user_email'])
+    drinks.append(doc['drink_id'])
+    values.append((doc['rating'] - NEUTRAL_RATING) / (MAX_RATING - NEUTRAL_RATING))
+  return (users, drinks, values)
+
+def _matrix(emails: list, drink_ids: list, values: list, rows: dict, cols: dict):
+  # drinks unknown to the model are left out
+  kept = [ (rows[e], cols[d], v) for e, d, v in zip(emails, drink_ids, values) if d in cols ]
+  r, c, v = (np.array(x) for x in zip(*kept)) if len(kept) else ([], [], [])
+  matrix = sparse.csr_matrix(
+    (np.asarray(v, dtype = np.float32), (np.asarray(r, dtype = np.int64), np.asarray(c, dtype = np.int64))),
+    shape = (len(rows), len(cols))
+  )
+  # a review and a favorite of the same drink add up, to at most a top rating
+  np.clip(matrix.data, -1, 1, out = matrix.data)
+  return matrix
+
+def topNeighbors(matrix, k: int):
+  """Finds the k columns of matrix most similar to each column, by cosine similarity. The
+    scores are computed with sparse matrix products, a block of columns at a time.
+
+    Arguments:
+      - matrix { csr_matrix }: features x items
+      - k { int }: neighbors kept per item
+
+    Returns:
+      - `csr_matrix`: items x items, row i holds the k items most similar to item i, best first
+  """
+  n = matrix.shape[1]
+  norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis = 0)).ravel())
+  items = (matrix @ sparse.diags(1 / np.maximum(norms, 1e-12))).T.tocsr()
+  transposed = items.T.tocsc()
+
+  k = min(k, n)
+  if not k:
+    return sparse.csr_matrix((n, n), dtype = np.float32)
+
+  cols, vals, counts = [], [], []
+  block = max(1, BLOCK_CELLS // max(n, 1))
+  for start in range(0, n, block):
+    scores = (items[start:start + block] @ transposed).toarray()
+    # never the item itself
+    scores[np.arange(len(scores)), np.arange(start, start + len(scores))] = 0
+
+    # the k best of every row, then best first within each row
+    top = np.argpartition(scores, n - k, axis = 1)[:, n - k:]
+    best = np.take_along_axis(scores, top, axis = 1)
+    order = np.argsort(-best, axis = 1, kind = 'stable')
+    top, best = np.take_along_axis(top, order, axis = 1), np.take_along_axis(best, order, axis = 1)
+
+    # only items with a feature in common
+    kept = best > 0
+    cols.append(top[kept])
+    vals.append(best[kept])
+    counts.append(kept.sum(axis = 1))
+
+  indptr = np.concatenate(([ 0 ], np.cumsum(np.concatenate(counts))))
+  return sparse.csr_matrix((np.concatenate(vals), np.concatenate(cols), indptr), shape = (n, n), dtype = np.float32)
+
+def _feeds(matrix, neighbors, size: int):
+  # yields (row, cols, scores) of every user, best first
+  n = neighbors.shape[1]
+  count = min(size, n)
+  block = max(1, BLOCK_CELLS // max(n, 1))
+  for start in range(0, matrix.shape[0], block):
+    taste = matrix[start:start + block]
+    if not count:
+      for i in range(taste.shape[0]):
+        yield (start + i, [], [])
+      continue
+
+    scores = (taste @ neighbors).toarray()
+    # drinks the user already rated or favorited
+    seen = taste.tocoo()
+    scores[seen.row, seen.col] = -np.inf
+
+    top = np.argpartition(-scores, count - 1, axis = 1)[:, :count]
+    best = np.take_along_axis(scores, top, 1)
+    order = np.argsort(-best, axis = 1)
+    top, best = np.take_along_axis(top, order, 1), np.take_along_axis(best, order, 1)
+    for i in range(taste.shape[0]):
+      kept = best[i] > 0
+      yield (start + i, top[i][kept], best[i][kept])
+
+def _writeFeeds(db: Database, emails: list[str], ids: list, feeds, date: datetime) -> int:
+  ops = [
+    ReplaceOne({ '_id': emails[row] }, {
+      'drink_ids': [ ids[col] for col in cols ],
+      'scores': [ float(score) for score in scores ],
+      'date': date
+    }, upsert = True)
+    for row, cols, scores in feeds
+  ]
+  writeMany(db.feeds, ops)
+  return len(ops)
+
+def _loadNeighbors(db: Database) -> tuple[dict, object]:
+  # the stored model as (_id -> col, drinks x drinks matrix)
+  docs = list(db.feed_neighbors.find({}, { 'neighbor_ids': 1, 'scores': 1 }))
+  cols = { doc['_id']: col for col, doc in enumerate(docs) }
+  rows, others, vals = [], [], []
+  for row, doc in enumerate(docs):
+    for _id, score in zip(doc.get('neighbor_ids') or [], doc.get('scores') or []):
+      rows.append(row)
+      others.append(cols.setdefault(_id, len(cols)))
+      vals.append(score)
+
+  n = len(cols)
+  rows, others = np.asarray(rows, dtype = np.int64), np.asarray(others, dtype = np.int64)
+  matrix = sparse.csr_matrix((np.asarray(vals, dtype = np.float32), (rows, others)), shape = (n, n))
+  return (cols, matrix)
+
+def writeMany(collection, ops: list) -> None:
+  """Runs bulk write operations a batch at a time, unordered.
+
+    Arguments:
+      - collection { Collection }
+      - ops { list }: pymongo write operations
+  """
+  for i in range(0, len(ops), BATCH):
+    collection.bulk_write(ops[i:i + BATCH], ordered = False)
+
+if __name__ == '__main__':
+  from os import environ
+  from argparse import ArgumentParser
+  from dotenv import load_dotenv
+  from db.driver import DBdriver
+
+  parser = ArgumentParser(description = 'Computes the personalized feeds of /users/<email>/feed.')
+  parser.add_argument('--full', action = 'store_true', help = 'retrain the model and rewrite every feed')
+  args = parser.parse_args()
+
+  load_dotenv()
+  db = DBdriver().client
+  size, k = int(environ.get('FEED_SIZE', 50)), int(environ.get('FEED_K', 50))
+
+  if args.full:
+    print('Trained', train(db, size, k), 'feeds')
+  else:
+    print('Refreshed', refresh(db, size, k), 'feeds')
@@ -0,0 +1,136 @@
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.database import Database
+from pymongo.errors import OperationFailure
+from logging import getLogger
+import __main__
+
+# every index the driver relies on, keyed by collection
+INDEXES = {
+  'users': [
+    # logins and every lookup by email
+    IndexModel([ ('email', ASCENDING) ], name = 'email', unique = True),
+    # detaching deleted drinks from favorites
+    IndexModel([ ('favorite_ids', ASCENDING) ], name = 'favorite_ids'),
+    # users whose feeds must be recomputed, see db.feed
+    IndexModel(
+      [ ('feed_dirty', ASCENDING) ], name = 'feed_dirty',
+      partialFilterExpression = { 'feed_dirty': True }
+    )
+  ],
+  'reviews': [
+    # duplicate check in createReview
+    IndexModel([ ('user_email', ASCENDING), ('drink_id', ASCENDING) ], name = 'user_email_drink_id', unique = True),
+    # reviews of a drink, paged by _id or date
+    IndexModel([ ('drink_id', ASCENDING), ('_id', ASCENDING) ], name = 'drink_id__id'),
+    IndexModel([ ('drink_id', ASCENDING), ('date', ASCENDING), ('_id', ASCENDING) ], name = 'drink_id_date'),
+    # reviews of a user, paged by _id or date
+    IndexModel([ ('user_email', ASCENDING), ('_id', ASCENDING) ], name = 'user_email__id'),
+    IndexModel([ ('user_email', ASCENDING), ('date', ASCENDING), ('_id', ASCENDING) ], name = 'user_email_date'),
+    # full-text search
+    IndexModel([ ('comment', TEXT) ], name = 'text')
+  ],
+  'drinks': [
+    # duplicate check in createDrink
+    IndexModel([ ('user_email', ASCENDING), ('name', ASCENDING) ], name = 'user_email_name', unique = True),
+    # drinks of a user, paged by _id
+    IndexModel([ ('user_email', ASCENDING), ('_id', ASCENDING) ], name = 'user_email__id'),
+    # leaderboards, paged by score then _id in the same direction
+    IndexModel([ ('rating', DESCENDING), ('_id', DESCENDING) ], name = 'rating_desc__id_desc'),
+    IndexModel([ ('trend', DESCENDING), ('_id', DESCENDING) ], name = 'trend_desc__id_desc'),
+    # searching by ingredient
+    IndexModel([ ('ingredient_keys', ASCENDING) ], name = 'ingredient_keys'),
+    # full-text search, a match in the name counts three times as much
+    IndexModel([ ('name', TEXT), ('des', TEXT) ], name = 'text', weights = { 'name': 3, 'des': 1 })
+  ]
+}
+
+def ensureIndexes(db: Database) -> tuple[list[str], dict[str, str]]:
+  """Creates every index in `INDEXES`, one at a time so an index that can't be built doesn't
+    keep the others from being created. Safe to run repeatedly since existing indexes are
+    skipped by MongoDB.
+
+    Arguments:
+      - db { Database }: the capstone database
+
+    Returns:
+      - `tuple[list[str], dict[str, str]]`: names of the indexes that are in place after this
+        call, and the error of each index that failed keyed by `collection.name`
+  """
+  logger = getLogger(__main__.__name__)
+  res = []
+  failed = {}
+
+  for collection, indexes in INDEXES.items():
+    for index in indexes:
+      name = index.document['name']
+      try:
+        res += db[collection].create_indexes([ index ])
+      except OperationFailure as e:
+        # e.g. a unique index can't be built while duplicates exist
+        logger.error(f"Failed to create index `{name}` on `{collection}`: {e}")
+        failed[f"{collection}.{name}"] = str(e)
+
+  return (res, failed)
+
+def reportIndexes(db: Database) -> dict[str, dict[str, list[str]]]:
+  """Reports the indexes of every collection in `INDEXES`.
+
+    Arguments:
+      - db { Database }: the capstone database
+
+    Returns:
+      - `dict[str, dict[str, list[str]]]`: for each collection, the names of the indexes that
+        `exist`, the expected ones that are `missing`, and the ones that were never used since
+        the server started (`unused`).
+  """
+  res = {}
+
+  for collection, indexes in INDEXES.items():
+    existing = [ name for name in db[collection].index_information() ]
+    expected = [ index.document['name'] for index in indexes ]
+
+    # $indexStats counts accesses since the last server restart
+    unused = []
+    try:
+      for stats in db[collection].aggregate([{ '$indexStats': {} }]):
+        if stats['name'] != '_id_' and stats['accesses']['ops'] == 0:
+          unused.append(stats['name'])
+    except OperationFailure:
+      pass
+
+    res[collection] = {
+      'exist': existing,
+      'missing': [ name for name in expected if name not in existing ],
+      'unused': unused
+    }
+
+  return res
+
+if __name__ == '__main__':
+  from argparse import ArgumentParser
+  from dotenv import load_dotenv
+  from db.driver import DBdriver
+
+  parser = ArgumentParser(description = 'Creates and reports the indexes of the capstone database.')
+  parser.add_argument('--report', action = 'store_true', help = 'only report, do not create indexes')
+  parser.add_argument('--backfill', action = 'store_true', help = 'also fill indexed fields of older documents')
+  args = parser.parse_args()
+
+  load_dotenv()
+  driver = DBdriver()
+  db = driver.client
+
+  if args.backfill:
+    print('Backfilled ingredient_keys of', driver.backfillIngredientKeys(), 'drinks')
+    print('Recomputed trend of', driver.backfillTrends(), 'drinks')
+
+  if not args.report:
+    ensured, failed = ensureIndexes(db)
+    print('Ensured:', ', '.join(ensured))
+    for name, err in failed.items():
+      print(f"Failed: {name}: {err}")
+
+  for collection, report in reportIndexes(db).items():
+    print(f"{collection}:")
+    for k, v in report.items():
+      print(f"  {k}: {', '.join(v) if len(v) else '-'}")
@@ -0,0 +1,126 @@
+from functools import partial
+from threading import Lock, RLock, Thread
+from time import monotonic
+from logging import getLogger
+from pymongo.database import Database
+from db.events import subscribe
+
+log = getLogger(__name__)
+
+class MemoryIndex:
+  def __init__(self, name: str, collections: list[str], ttl: float) -> None:
+    """Base of the indexes held in memory by each process. The index is built from the
+      database on the first lookup, kept in step with the changes `DBdriver` publishes in this
+      process, and rebuilt in the background every ttl seconds to pick up the changes of other
+      workers. Changes published while a build scans the database are applied to the index in
+      use and replayed on the new one, so none are lost whatever the scan already read.
+
+      Subclasses implement `scan`, `install`, and `apply`, and guard their state with `lock`.
+
+      Arguments:
+        - name { str }: what the index is, for logs
+        - collections { list[str] }: collections whose changes are applied
+        - ttl { float }: seconds before the index is rebuilt
+    """
+    self.name = name
+    self.ttl = ttl
+    self.expires = None
+    self.refreshing = False
+    self.replay = None # changes published during a build, None when no build runs
+    # reentrant since `apply` runs under it and takes it again
+    self.lock = RLock()
+    self.load_lock = Lock()
+    for collection in collections:
+      subscribe(collection, partial(self._listener, collection))
+
+  def scan(self, db: Database):
+    """Builds the state of a new index from db, without touching the one in use.
+
+      Arguments:
+        - db { Database }
+
+      Returns:
+        - the state, passed to `install`
+    """
+    raise NotImplementedError
+
+  def install(self, state) -> None:
+    """Replaces the index in use with the state of `scan`. Called under `lock`.
+
+      Arguments:
+        - state: returned by `scan`
+    """
+    raise NotImplementedError
+
+  def apply(self, collection: str, action: str, _id, doc: dict = None) -> None:
+    """Applies a change published by `DBdriver`, see `db.events.subscribe`.
+
+      Arguments:
+        - collection { str }
+        - action { str }: one of ['create', 'update', 'delete']
+        - _id: _id of the changed document
+        - doc { dict, optional }: the document after the change. Defaults to None
+    """
+    raise NotImplementedError
+
+  def load(self, db: Database) -> None:
+    """Rebuilds the index from db. Lookups keep using the old index meanwhile.
+
+      Arguments:
+        - db { Database }
+    """
+    with self.lock:
+      self.replay = []
+    try:
+      state = self.scan(db)
+    except Exception:
+      with self.lock:
+        self.replay = None
+      raise
+
+    with self.lock:
+      self.install(state)
+      # in order, so the last change of a document wins
+      for change in self.replay:
+        self.apply(*change)
+      self.replay = None
+      self.expires = monotonic() + self.ttl
+
+  def ensureLoaded(self, db: Database) -> None:
+    """Builds the index if it was never built, or starts rebuilding it in the background if it
+      is stale.
+
+      Arguments:
+        - db { Database }
+    """
+    # the first lookup waits for the index
+    if self.expires is None:
+      with self.load_lock:
+        if self.expires is None:
+          self.load(db)
+      return
+
+    # later ones keep serving while it's rebuilt
+    with self.lock:
+      stale = self.expires <= monotonic() and not self.refreshing
+      if stale:
+        self.refreshing = True
+    if stale:
+      Thread(target = self._refresh, args = (db,), daemon = True).start()
+
+  def _refresh(self, db: Database) -> None:
+    try:
+      self.load(db)
+    except Exception:
+      log.exception("Failed to rebuild the %s", self.name)
+    finally:
+      with self.lock:
+        self.refreshing = False
+
+  def _listener(self, collection: str, action: str, _id, doc: dict = None) -> None:
+    with self.lock:
+      if self.replay is not None:
+        self.replay.append((collection, action, _id, doc))
+      # before the first build there is nothing to apply it to
+      if self.expires is not None:
+        self.apply(collection, action, _id, doc)
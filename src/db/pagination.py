@@ -0,0 +1,156 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from bson import encode, decode
+from bson.errors import BSONError
+
+def parseSort(sort: str) -> list[tuple[str, int]]:
+  """Converts a sort string into a list of (field, direction) pairs. A leading `-` sorts
+    descending. `_id` is always appended as a tie breaker in the same direction so every key is
+    unique and the whole sort can be served by one index, forwards or backwards.
+
+    Arguments:
+      - sort { str }: e.g. `"_id"`, `"-date"`
+
+    Returns:
+      - `list[tuple[str, int]]`: pairs that can be passed to `Cursor.sort`
+  """
+  field, direction = (sort[1:], -1) if sort.startswith('-') else (sort, 1)
+  res = [ (field, direction) ]
+  if field != '_id':
+    res.append(('_id', direction))
+  return res
+
+def encodeToken(doc: dict, sort: list[tuple[str, int]]) -> str:
+  """Creates an opaque continuation token pointing right after doc.
+
+    Arguments:
+      - doc { dict }: the last document of a page
+      - sort { list[tuple[str, int]] }: the sort the page was fetched with
+
+    Returns:
+      - `str`: url-safe token
+  """
+  values = [ doc.get(field) for field, _ in sort ]
+  return urlsafe_b64encode(encode({ 'v': values })).decode('ascii')
+
+def decodeToken(token: str) -> list:
+  """Reads the sort key values out of a token created by `encodeToken`.
+
+    Arguments:
+      - token { str }
+
+    Raises:
+      - `ValueError`: raised if the token is malformed
+
+    Returns:
+      - `list`: the sort key values of the last document of the previous page
+  """
+  try:
+    return decode(urlsafe_b64decode(token.encode('ascii')))['v']
+  except (BSONError, ValueError, KeyError, TypeError):
+    raise ValueError('Malformed continuation token')
+
+def keysetFilter(sort: list[tuple[str, int]], token: str) -> dict:
+  """Builds the filter that selects every document after token in the given sort order.
+
+    Arguments:
+      - sort { list[tuple[str, int]] }
+      - token { str }: continuation token from `encodeToken`
+
+    Raises:
+      - `ValueError`: raised if the token is malformed or doesn't match the sort
+
+    Returns:
+      - `dict`: the filter, empty if token is None
+  """
+  if token is None:
+    return {}
+
+  values = decodeToken(token)
+  if len(values) != len(sort):
+    raise ValueError('Continuation token does not match the sort order')
+
+  # (a > x) or (a == x and b > y) or ...
+  clauses = []
+  for i, (field, direction) in enumerate(sort):
+    clause = { sort[j][0]: values[j] for j in range(i) }
+    clause[field] = { '$gt' if direction == 1 else '$lt': values[i] }
+    clauses.append(clause)
+
+  return clauses[0] if len(clauses) == 1 else { '$or': clauses }
+
+def paginate(
+  collection, query: dict, sort: list[tuple[str, int]], limit: int = None, after: str = None,
+  projection: dict = None
+) -> tuple[list[dict], str or None]:
+  """Fetches one page of documents from collection using keyset pagination.
+
+    Arguments:
+      - collection { Collection }
+      - query { dict }: filter for the documents
+      - sort { list[tuple[str, int]] }: see `parseSort`
+      - limit { int, optional }: max documents in the page. Defaults to None for all
+      - after { str, optional }: continuation token of the previous page. Defaults to None
+      - projection { dict, optional }: fields to return. Defaults to None for every field
+
+    Raises:
+      - `ValueError`: raised if the token is malformed
+
+    Returns:
+      - `tuple[list[dict], str or None]`: the documents and the token of the next page, `None`
+        if this is the last page.
+  """
+  keyset = keysetFilter(sort, after)
+  if len(keyset):
+    query = { '$and': [ query, keyset ] }
+
+  # the sort keys are needed for the token
+  if projection is not None:
+    projection = dict(projection, **{ field: 1 for field, _ in sort })
+  cursor = collection.find(query, projection).sort(sort)
+  if limit is None:
+    return (list(cursor), None)
+
+  # fetch one extra to know if there's a next page
+  return _page(list(cursor.limit(limit + 1)), sort, limit)
+
+def paginatePipeline(
+  collection, pipeline: list[dict], sort: list[tuple[str, int]], limit: int = None,
+  after: str = None, projection: dict = None
+) -> tuple[list[dict], str or None]:
+  """Aggregation version of `paginate`, for pages sorted by fields computed by pipeline.
+
+    Arguments:
+      - collection { Collection }
+      - pipeline { list[dict] }: stages that select the documents and compute the sort keys
+      - sort { list[tuple[str, int]] }: see `parseSort`
+      - limit { int, optional }: max documents in the page. Defaults to None for all
+      - after { str, optional }: continuation token of the previous page. Defaults to None
+      - projection { dict, optional }: fields to return. Defaults to None for every field
+
+    Raises:
+      - `ValueError`: raised if the token is malformed
+
+    Returns:
+      - `tuple[list[dict], str or None]`: the documents and the token of the next page, `None`
+        if this is the last page.
+  """
+  stages = list(pipeline)
+  keyset = keysetFilter(sort, after)
+  if len(keyset):
+    stages.append({ '$match': keyset })
+  stages.append({ '$sort': dict(sort) })
+  if limit is not None:
+    stages.append({ '$limit': limit + 1 })
+  if projection is not None:
+    stages.append({ '$project': dict(projection, **{ field: 1 for field, _ in sort }) })
+
+  docs = list(collection.aggregate(stages))
+  return (docs, None) if limit is None else _page(docs, sort, limit)
+
+def _page(docs: list[dict], sort: list[tuple[str, int]], limit: int) -> tuple[list[dict], str or None]:
+  # the extra document only tells there's a next page
+  if len(docs) <= limit:
+    return (docs, None)
+
+  docs = docs[:limit]
+  return (docs, encodeToken(docs[-1], sort))
@@ -0,0 +1,108 @@
+from os import environ, getpid
+from random import sample
+from threading import Lock, Thread
+from time import monotonic
+from logging import getLogger
+from pymongo.database import Database
+
+log = getLogger(__name__)
+
+class Sampler:
+  def __init__(self, size: int = 1000, ttl: float = 300.0) -> None:
+    """Serves random samples from an in-memory pool of _ids instead of running `$sample` on
+      every request. Each pool is itself a `$sample` of its collection, so samples drawn from it
+      are uniform over the collection as of the last refresh. Stale pools keep serving while a
+      background thread refreshes them.
+
+      Arguments:
+        - size { int, optional }: max _ids pooled per collection, 0 disables the pool.
+          Defaults to 1000
+        - ttl { float, optional }: seconds before a pool is refreshed. Defaults to 300.0
+    """
+    self.size = size
+    self.ttl = ttl
+    self.pools = {}
+    self.refreshing = set()
+    self.lock = Lock()
+
+  def sample(self, db: Database, collection: str, size: int) -> list or None:
+    """Draws size random _ids of collection from its pool.
+
+      Arguments:
+        - db { Database }: used to refresh the pool
+        - collection { str }: name of the collection
+        - size { int }: number of _ids to draw
+
+      Returns:
+        - `list` or `None`: the _ids, or `None` if the pool is cold or smaller than size and
+          the caller should fall back to `$sample`.
+    """
+    if not self.size:
+      return None
+
+    with self.lock:
+      ids, expires = self.pools.get(collection, (None, 0))
+      stale = expires <= monotonic() and collection not in self.refreshing
+      if stale:
+        self.refreshing.add(collection)
+
+    if stale:
+      Thread(target = self._refresh, args = (db, collection), daemon = True).start()
+
+    if ids is None or size > len(ids):
+      return None
+    return sample(ids, size)
+
+  def discard(self, collection: str, *ids) -> None:
+    """Removes deleted items from the pool of collection so they are no longer drawn.
+
+      Arguments:
+        - collection { str }: name of the collection
+        - ids: _ids of the deleted items
+    """
+    if not len(ids):
+      return
+
+    removed = set(ids)
+    with self.lock:
+      entry = self.pools.get(collection)
+      if entry is not None:
+        self.pools[collection] = ([ _id for _id in entry[0] if _id not in removed ], entry[1])
+
+  def _refresh(self, db: Database, collection: str) -> None:
+    try:
+      cursor = db[collection].aggregate([
+        { "$sample": { "size": self.size } },
+        { "$project": { "_id": 1 } }
+      ])
+      # $sample may return duplicates
+      ids = list(dict.fromkeys(doc["_id"] for doc in cursor))
+      with self.lock:
+        self.pools[collection] = (ids, monotonic() + self.ttl)
+    except Exception:
+      log.exception("Failed to refresh the sample pool of %s", collection)
+    finally:
+      with self.lock:
+        self.refreshing.discard(collection)
+
+_sampler: Sampler = None
+_pid: int = None
+_lock = Lock()
+
+def getSampler() -> Sampler:
+  """Returns the sampler of this process, created on first use from `SAMPLE_POOL_SIZE` and
+    `SAMPLE_POOL_TTL`. Forked workers get their own pools since threads don't survive a fork.
+
+    Returns:
+      - `Sampler`
+  """
+  global _sampler, _pid
+  if _sampler is None or _pid != getpid():
+    with _lock:
+      if _sampler is None or _pid != getpid():
+        _sampler = Sampler(
+          int(environ.get("SAMPLE_POOL_SIZE", 1000)),
+          float(environ.get("SAMPLE_POOL_TTL", 300))
+        )
+        _pid = getpid()
+  return _sampler
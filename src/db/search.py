@@ -0,0 +1,239 @@
+from os import environ
+from re import compile
+from math import log
+from heapq import nlargest
+from operator import itemgetter
+from collections import defaultdict, Counter
+from threading import Lock
+from pymongo.database import Database
+from db.memory import MemoryIndex
+
+# searchable fields of each collection and how much a term found in them counts
+TEXT_FIELDS = {
+  'drinks': { 'name': 3, 'des': 1 },
+  'reviews': { 'comment': 1 }
+}
+
+STOPWORDS = frozenset((
+  "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in", "into", "is", "it",
+  "no", "not", "of", "on", "or", "so", "such", "that", "the", "their", "then", "there", "these",
+  "they", "this", "to", "was", "will", "with"
+))
+
+_word = compile(r"\w+")
+
+def tokenize(text: str) -> list[str]:
+  """Splits text into lowercase terms, leaving out stopwords.
+
+    Arguments:
+      - text { str }
+
+    Returns:
+      - `list[str]`: the terms in the order they appear
+  """
+  if not text:
+    return []
+  return [ word for word in _word.findall(str(text).lower()) if word not in STOPWORDS ]
+
+def highlight(text: str, terms: set[str], width: int = 160) -> str or None:
+  """Wraps the terms found in text in `<em>` tags, keeping a window of about width characters
+    around the first one.
+
+    Arguments:
+      - text { str }
+      - terms { set[str] }: lowercase terms, see `tokenize`
+      - width { int, optional }: max characters of text kept. Defaults to 160
+
+    Returns:
+      - `str` or `None`: the highlighted snippet, `None` if no term is found
+  """
+  if not text:
+    return None
+  text = str(text)
+  matches = [ m for m in _word.finditer(text) if m.group().lower() in terms ]
+  if not len(matches):
+    return None
+
+  # center the window on the first match
+  start = max(0, min(matches[0].start() - width // 4, len(text) - width))
+  end = min(len(text), start + width)
+
+  res = [ "…" if start else "" ]
+  i = start
+  for m in matches:
+    if m.start() < start or m.end() > end:
+      continue
+    res += [ text[i:m.start()], "<em>", m.group(), "</em>" ]
+    i = m.end()
+  res += [ text[i:end], "…" if end < len(text) else "" ]
+  return "".join(res)
+
+class MongoBackend:
+  def __init__(self) -> None:
+    """Searches with the text indexes of MongoDB, see `db.indexes`. The indexes are maintained
+      by the server, so this backend works across any number of workers.
+    """
+
+  def search(self, db: Database, q: str, collections: list[str], limit: int) -> list[tuple]:
+    """Finds the best matches of q.
+
+      Arguments:
+        - db { Database }
+        - q { str }: the query, in MongoDB `$text` syntax
+        - collections { list[str] }: collections to search, keys of `TEXT_FIELDS`
+        - limit { int }: max matches
+
+      Returns:
+        - `list[tuple]`: (score, collection, _id) of each match, best first
+    """
+    res = []
+    for collection in collections:
+      score = { 'score': { '$meta': 'textScore' } }
+      cursor = db[collection].find({ '$text': { '$search': q } }, score)
+      res += [
+        (doc['score'], collection, doc['_id'])
+        for doc in cursor.sort([ ('score', { '$meta': 'textScore' }) ]).limit(limit)
+      ]
+    return nlargest(limit, res, key = itemgetter(0))
+
+class LocalBackend(MemoryIndex):
+  def __init__(self, k1: float = 1.2, b: float = 0.75, ttl: float = 900.0) -> None:
+    """Searches with an in-memory inverted index ranked by BM25. The index is built from the
+      database on the first search, kept in step with the changes `DBdriver` publishes in this
+      process, and rebuilt in the background every ttl seconds to pick up the changes of other
+      workers, see `MemoryIndex`.
+
+      Arguments:
+        - k1 { float, optional }: BM25 term frequency saturation. Defaults to 1.2
+        - b { float, optional }: BM25 length normalization. Defaults to 0.75
+        - ttl { float, optional }: seconds before the index is rebuilt. Defaults to 900.0
+    """
+    self.k1 = k1
+    self.b = b
+    self.postings = defaultdict(dict) # term -> { (collection, _id): weighted tf }
+    self.lengths = {} # (collection, _id) -> weighted length
+    self.terms = {} # (collection, _id) -> its terms, to remove it without a scan
+    self.total = 0
+    super().__init__("search index", list(TEXT_FIELDS), ttl)
+
+  def add(self, collection: str, doc: dict) -> None:
+    """Indexes doc, replacing the previous version of it.
+
+      Arguments:
+        - collection { str }: a key of `TEXT_FIELDS`
+        - doc { dict }: a document with its `_id` and text fields
+    """
+    key = (collection, doc['_id'])
+    tf = self._tf(collection, doc)
+    with self.lock:
+      self._remove(key)
+      self._insert(self.postings, self.lengths, self.terms, key, tf)
+      self.total += self.lengths[key]
+
+  def remove(self, collection: str, _id) -> None:
+    """Drops a document from the index.
+
+      Arguments:
+        - collection { str }
+        - _id: _id of the document
+    """
+    with self.lock:
+      self._remove((collection, _id))
+
+  def scan(self, db: Database) -> tuple[dict, dict, dict]:
+    postings, lengths, terms = defaultdict(dict), {}, {}
+    for collection, fields in TEXT_FIELDS.items():
+      for doc in db[collection].find({}, { field: 1 for field in fields }):
+        key = (collection, doc['_id'])
+        self._insert(postings, lengths, terms, key, self._tf(collection, doc))
+    return (postings, lengths, terms)
+
+  def install(self, state: tuple[dict, dict, dict]) -> None:
+    self.postings, self.lengths, self.terms = state
+    self.total = sum(self.lengths.values())
+
+  def apply(self, collection: str, action: str, _id, doc: dict = None) -> None:
+    if action == 'delete':
+      self.remove(collection, _id)
+    elif doc is not None:
+      self.add(collection, doc)
+
+  def search(self, db: Database, q: str, collections: list[str], limit: int) -> list[tuple]:
+    """Finds the best matches of q.
+
+      Arguments:
+        - db { Database }: loaded on the first search
+        - q { str }: the query, split with `tokenize`
+        - collections { list[str] }: collections to search, keys of `TEXT_FIELDS`
+        - limit { int }: max matches
+
+      Returns:
+        - `list[tuple]`: (score, collection, _id) of each match, best first
+    """
+    self.ensureLoaded(db)
+
+    scores = defaultdict(float)
+    with self.lock:
+      n = len(self.lengths)
+      avg = self.total / n if n else 0
+      for term in set(tokenize(q)):
+        postings = self.postings.get(term)
+        if not postings:
+          continue
+
+        idf = log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+        for key, tf in postings.items():
+          if key[0] not in collections:
+            continue
+          norm = self.k1 * (1 - self.b + self.b * self.lengths[key] / avg)
+          scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+    top = nlargest(limit, scores.items(), key = itemgetter(1))
+    return [ (score, collection, _id) for (collection, _id), score in top ]
+
+  def _tf(self, collection: str, doc: dict) -> Counter:
+    # weighted count of each term of the text fields
+    tf = Counter()
+    for field, weight in TEXT_FIELDS[collection].items():
+      for term in tokenize(doc.get(field)):
+        tf[term] += weight
+    return tf
+
+  def _insert(self, postings: dict, lengths: dict, terms: dict, key: tuple, tf: Counter) -> None:
+    for term, count in tf.items():
+      postings[term][key] = count
+    lengths[key] = sum(tf.values())
+    terms[key] = tuple(tf)
+
+  def _remove(self, key: tuple) -> None:
+    length = self.lengths.pop(key, None)
+    if length is None:
+      return
+
+    self.total -= length
+    for term in self.terms.pop(key):
+      del self.postings[term][key]
+      if not self.postings[term]:
+        del self.postings[term]
+
+_backend = None
+_lock = Lock()
+
+def getSearch():
+  """Returns the search backend of this process, chosen on first use by `SEARCH_BACKEND`:
+    'mongo' (default) for `MongoBackend` or 'local' for `LocalBackend`, rebuilt every
+    `SEARCH_TTL` seconds.
+
+    Returns:
+      - `MongoBackend` or `LocalBackend`
+  """
+  global _backend
+  if _backend is None:
+    with _lock:
+      if _backend is None:
+        kind = environ.get('SEARCH_BACKEND', 'mongo')
+        if kind == 'local':
+          _backend = LocalBackend(ttl = float(environ.get('SEARCH_TTL', 900)))
+        else:
+          _backend = MongoBackend()
+  return _backend
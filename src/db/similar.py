@@ -0,0 +1,97 @@
+from datetime import datetime
+from logging import getLogger
+import numpy as np
+from scipy import sparse
+from pymongo import ReplaceOne
+from pymongo.database import Database
+from db.feed import topNeighbors, writeMany
+
+log = getLogger(__name__)
+
+def build(db: Database, k: int = 20) -> int:
+  """Precomputes the k drinks whose ingredients are most similar to each drink's and stores
+    them in `similar_drinks`, which `DBdriver.similarDrinks` reads. Each drink is a binary
+    vector over every ingredient key (see `ingredient_keys`) and two drinks are as similar as
+    the cosine of their vectors, computed with sparse matrix products a block at a time.
+
+    Drinks created or whose ingredients changed since the last build have no stored neighbors
+    and are scored by `similarTo` when asked for. They only show up among the neighbors of
+    other drinks after the next build.
+
+    Arguments:
+      - db { Database }
+      - k { int, optional }: neighbors kept per drink. Defaults to 20
+
+    Returns:
+      - `int`: the number of drinks whose neighbors were written
+  """
+  started = datetime.now()
+  ids, vocab, rows, cols = [], {}, [], []
+  for doc in db.drinks.find({}, { 'ingredient_keys': 1 }):
+    keys = { vocab.setdefault(key, len(vocab)) for key in doc.get('ingredient_keys') or [] }
+    rows += keys
+    cols += [ len(ids) ] * len(keys)
+    ids.append(doc['_id'])
+
+  # ingredients x drinks
+  matrix = sparse.csr_matrix(
+    (np.ones(len(rows), dtype = np.float32), (np.asarray(rows, dtype = np.int64), np.asarray(cols, dtype = np.int64))),
+    shape = (len(vocab), len(ids))
+  )
+  neighbors = topNeighbors(matrix, k)
+
+  # store the neighbors, then drop the ones of deleted drinks
+  ops = []
+  for row, _id in enumerate(ids):
+    first, last = neighbors.indptr[row], neighbors.indptr[row + 1]
+    ops.append(ReplaceOne({ '_id': _id }, {
+      'neighbor_ids': [ ids[i] for i in neighbors.indices[first:last] ],
+      'scores': neighbors.data[first:last].tolist(),
+      'date': started
+    }, upsert = True))
+  writeMany(db.similar_drinks, ops)
+  db.similar_drinks.delete_many({ 'date': { '$lt': started } })
+  log.info("Stored the similar drinks of %d drinks", len(ops))
+  return len(ops)
+
+def similarTo(db: Database, _id, keys: list[str], limit: int) -> list[tuple]:
+  """Scores every drink sharing an ingredient with keys in a single aggregation, for the drinks
+    `build` hasn't seen yet. Scores match the ones `build` stores.
+
+    Arguments:
+      - db { Database }
+      - _id { ObjectId }: the drink itself, left out
+      - keys { list[str] }: `ingredient_keys` of the drink
+      - limit { int }: max drinks
+
+    Returns:
+      - `list[tuple]`: (score, _id) of the similar drinks, best first
+  """
+  keys = list(set(keys))
+  if not len(keys) or limit <= 0:
+    return []
+
+  # the shared ingredients over the geometric mean of both ingredient counts
+  pipeline = [
+    { '$match': { 'ingredient_keys': { '$in': keys }, '_id': { '$ne': _id } } },
+    { '$project': { 'score': { '$divide': [
+      { '$size': { '$setIntersection': [ '$ingredient_keys', keys ] } },
+      { '$sqrt': { '$multiply': [ len(keys), { '$size': { '$setUnion': [ '$ingredient_keys', [] ] } } ] } }
+    ] } } },
+    { '$sort': { 'score': -1, '_id': -1 } },
+    { '$limit': limit }
+  ]
+  return [ (doc['score'], doc['_id']) for doc in db.drinks.aggregate(pipeline) ]
+
+if __name__ == '__main__':
+  from os import environ
+  from argparse import ArgumentParser
+  from dotenv import load_dotenv
+  from db.driver import DBdriver
+
+  parser = ArgumentParser(description = 'Computes the similar drinks of /drinks/<_id>/similar.')
+  parser.parse_args()
+
+  load_dotenv()
+  db = DBdriver().client
+  print('Stored the similar drinks of', build(db, int(environ.get('SIMILAR_K', 20))), 'drinks')
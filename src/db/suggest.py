@@ -0,0 +1,127 @@
+from os import environ
+from bisect import bisect_left, insort
+from heapq import nlargest
+from re import compile
+from threading import Lock
+from pymongo.database import Database
+from db.memory import MemoryIndex
+
+_word = compile(r"\w+")
+
+def foldKeys(name: str) -> list[str]:
+  """Returns the case-folded keys a drink name is found by: the whole name and the rest of it
+    from the start of every word, so "lat" suggests "Caramel Latte".
+
+    Arguments:
+      - name { str }
+
+    Returns:
+      - `list[str]`
+  """
+  folded = " ".join(str(name or "").casefold().split())
+  return list(dict.fromkeys(folded[m.start():] for m in _word.finditer(folded)))
+
+class Suggester(MemoryIndex):
+  def __init__(self, ttl: float = 300.0) -> None:
+    """Suggests drinks by the prefix of their names from a sorted array of name keys held in
+      memory, so each lookup is a binary search instead of a regex scan. The array is updated
+      by the changes `DBdriver` publishes in this process and rebuilt in the background every
+      ttl seconds to pick up new ratings and the changes of other workers, see `MemoryIndex`.
+
+      Arguments:
+        - ttl { float, optional }: seconds before the array is rebuilt. Defaults to 300.0
+    """
+    self.keys = [] # sorted (key, _id)
+    self.drinks = {} # _id -> (name, rating)
+    super().__init__("drink name index", [ 'drinks' ], ttl)
+
+  def suggest(self, db: Database, prefix: str, limit: int) -> list[dict]:
+    """Finds the best rated drinks with a word of their name starting with prefix.
+
+      Arguments:
+        - db { Database }: loaded on the first call and whenever the array is stale
+        - prefix { str }: matched case insensitively
+        - limit { int }: max drinks
+
+      Returns:
+        - `list[dict]`: the `_id`, `name`, and `rating` of each drink, best rated first
+    """
+    self.ensureLoaded(db)
+
+    prefix = " ".join(prefix.casefold().split())
+    if not prefix:
+      return []
+
+    with self.lock:
+      lo = bisect_left(self.keys, (prefix,))
+      hi = bisect_left(self.keys, (prefix + "\U0010ffff",), lo)
+      _ids = { _id for _, _id in self.keys[lo:hi] }
+      best = nlargest(limit, _ids, key = lambda _id: self.drinks[_id][1])
+      return [
+        { '_id': _id, 'name': self.drinks[_id][0], 'rating': self.drinks[_id][1] } for _id in best
+      ]
+
+  def add(self, doc: dict) -> None:
+    """Indexes a drink, replacing the previous version of it.
+
+      Arguments:
+        - doc { dict }: a drink with its `_id`, `name`, and `rating`
+    """
+    with self.lock:
+      self._remove(doc['_id'])
+      self.drinks[doc['_id']] = (doc.get('name'), doc.get('rating', -1))
+      for key in foldKeys(doc.get('name')):
+        insort(self.keys, (key, doc['_id']))
+
+  def remove(self, _id) -> None:
+    """Drops a drink from the index.
+
+      Arguments:
+        - _id: _id of the drink
+    """
+    with self.lock:
+      self._remove(_id)
+
+  def scan(self, db: Database) -> tuple[dict, list]:
+    drinks = {}
+    keys = []
+    for doc in db.drinks.find({}, { 'name': 1, 'rating': 1 }):
+      drinks[doc['_id']] = (doc.get('name'), doc.get('rating', -1))
+      keys += [ (key, doc['_id']) for key in foldKeys(doc.get('name')) ]
+    keys.sort()
+    return (drinks, keys)
+
+  def install(self, state: tuple[dict, list]) -> None:
+    self.drinks, self.keys = state
+
+  def apply(self, collection: str, action: str, _id, doc: dict = None) -> None:
+    if action == 'delete':
+      self.remove(_id)
+    elif doc is not None:
+      self.add(doc)
+
+  def _remove(self, _id) -> None:
+    entry = self.drinks.pop(_id, None)
+    if entry is None:
+      return
+
+    for key in foldKeys(entry[0]):
+      i = bisect_left(self.keys, (key, _id))
+      if i < len(self.keys) and self.keys[i] == (key, _id):
+        del self.keys[i]
+
+_suggester: Suggester = None
+_lock = Lock()
+
+def getSuggester() -> Suggester:
+  """Returns the drink name index of this process, created on first use from `SUGGEST_TTL`.
+
+    Returns:
+      - `Suggester`
+  """
+  global _suggester
+  if _suggester is None:
+    with _lock:
+      if _suggester is None:
+        _suggester = Suggester(float(environ.get('SUGGEST_TTL', 300)))
+  return _suggester
@@ -1,11 +1,18 @@
 from flask import Flask
-from flask_restful import Api, Resource
+from flask_restful import Resource
 from flask_jwt_extended import JWTManager as JWT
 from flask_cors import CORS
 from dotenv import load_dotenv  
 from os import environ
 from resources import SingleUser, SingleDrink, SingleReview
 from resources import MultipleUser, MultipleDrink, MultipleReview
+from resources import UserItems, DrinkReviews, DrinkRanking, DrinkSearch, DrinkSuggest, Search
+from resources import DrinkSimilar, UserFeed, Batch, CacheStats
+from resources.auth import registerLoaders
+from resources.api import Api
+from resources.representation import output_json
+from db.driver import DBdriver
+from db.indexes import ensureIndexes
 
 app = Flask(__name__) # init flask
 
@@ -16,9 +23,17 @@ if not load_dotenv():
 app.logger.info('.env loaded')
 
 app.config["JWT_SECRET_KEY"] = environ["JWT_SECRET"]
-JWT(app) # JWT friendly
+
+# make sure every index the driver relies on exists
+if environ.get("MONGODB_ENSURE_INDEXES", "1") == "1":
+  try:
+    ensureIndexes(DBdriver().client)
+  except ConnectionError as e:
+    app.logger.error(f"Failed to ensure indexes: {e}")
+registerLoaders(JWT(app)) # JWT friendly
 CORS(app) # CORS friendly
 api = Api(app) # prepare to accept resources
+api.representation("application/json")(output_json) # fast JSON encoding
 
 # SINGLE RESOURCES
 api.add_resource(SingleUser, "/users/<string:email>", endpoint = "user")
@@ -30,15 +45,33 @@ api.add_resource(MultipleUser, "/users", endpoint = "users")
 api.add_resource(MultipleDrink, "/drinks", endpoint = "drinks")
 api.add_resource(MultipleReview, "/reviews", endpoint = "reviews")
 
+# NESTED RESOURCES
+api.add_resource(UserItems, "/users/<string:email>/<any(drinks, favorites, reviews):type>", endpoint = "user_items")
+api.add_resource(UserFeed, "/users/<string:email>/feed", endpoint = "user_feed")
+api.add_resource(DrinkReviews, "/drinks/<string:_id>/reviews", endpoint = "drink_reviews")
+api.add_resource(DrinkSimilar, "/drinks/<string:_id>/similar", endpoint = "drink_similar")
+# static rules so they take precedence over /drinks/<string:_id>
+api.add_resource(DrinkRanking, "/drinks/top", endpoint = "drinks_top", defaults = { "board": "top" })
+api.add_resource(DrinkRanking, "/drinks/trending", endpoint = "drinks_trending", defaults = { "board": "trending" })
+api.add_resource(DrinkSearch, "/drinks/search", endpoint = "drinks_search")
+api.add_resource(DrinkSuggest, "/drinks/suggest", endpoint = "drinks_suggest")
+
+# SEARCH
+api.add_resource(Search, "/search", endpoint = "search")
+
+# BATCH
+api.add_resource(Batch, "/batch", endpoint = "batch")
+
 class Sandbox(Resource):
   def post(self):
-    from db.driver import DBdriver
     d = DBdriver()
     d.seed()
     return 204
 
 api.add_resource(Sandbox, "/seed", endpoint = "seed")
 
+api.add_resource(CacheStats, "/stats/cache", endpoint = "cache_stats")
+
 if __name__ == "__main__":
   app.run(
     debug = True,
@@ -18,6 +18,7 @@ class Drink:
     self.ingredients = ingredients
     self.rating = -1 # set to -1 for no reviews with ratings, increments of .5
     self.sum = 0.0 # rolling sum for online avg calcs
+    self.count = 0 # number of ratings in sum
     self.img = img
     self.des = des
 
@@ -36,6 +37,7 @@ class Drink:
     
     # add review
     self.review_ids.add(_id)
+    self.count += 1
     # calc the new avg
     self.update_rating(val)
 
@@ -56,6 +58,7 @@ class Drink:
 
     # remove it
     self.review_ids.remove(_id)
+    self.count -= 1
     # calc the new avg
     self.update_rating(-val)
     return True
@@ -63,11 +66,13 @@ class Drink:
   def update_rating(self, val: int):
     # calc the new avg
     self.sum += val
-    self.rating = 0.5 * round((self.sum / len(self.review_ids)) / 0.5)
+    self.rating = 0.5 * round((self.sum / self.count) / 0.5) if self.count else -1
 
   def toJSON(self) -> dict:
-    res = vars(self)
-    if res['_id'] is not None:
-      res['_id'] = str(res['_id'])
-    res['review_ids'] = [str(_id) for _id in self.review_ids]
-    return res
\ No newline at end of file
+    """Returns the fields of this Drink without changing it. ObjectIds and sets are encoded
+      by `models.serialize` when the response is written.
+
+      Returns:
+        - `dict`: the fields of this Drink
+    """
+    return dict(vars(self))
\ No newline at end of file
@@ -7,28 +7,26 @@ class Review:
   def __init__(
     self, user_email: str, drink_id: ObjectId,
     comment: str, rating: int, drink_name: str,
-    date = datetime.now(),
+    date: datetime = None,
   ) -> None:
-    """Create a Review object according to our system diagram.
+    """Create a Review object according to our system diagram. date defaults to now.
     """
     self.user_email = user_email
     self.drink_id = drink_id
     self.comment = comment
     self.rating = rating
-    self.date = date
+    self.date = datetime.now() if date is None else date
     self.drink_name = drink_name
 
   def __repr__(self) -> str:
     data = pformat(vars(self))[1:-1]
     return f"Review <\n {data}\n>"
 
-  #need to come back to this funciton
   def toJSON(self) -> dict:
-    res = vars(self)
-    # convert _id fields and date
-    if self._id is not None:
-      res['_id'] = str(self._id)
-    res['drink_id'] = str(self.drink_id)
-    res['date'] = str(self.date)
+    """Returns the fields of this Review without changing it. ObjectIds and dates are encoded
+      by `models.serialize` when the response is written.
 
-    return res
\ No newline at end of file
+      Returns:
+        - `dict`: the fields of this Review
+    """
+    return dict(vars(self))
\ No newline at end of file
@@ -12,6 +12,7 @@ class User:
     self.lname = lname
     self.email = email
     self.pw = pw
+    self.ver = 0 # bumped to revoke the user's tokens
 
     # set _id fields
     self.review_ids = set() #ObjectIds of reviews from this user
@@ -70,18 +71,10 @@ class User:
     return False
   
   def toJSON(self) -> dict:
-    """Converts this object into a JSON-compatible dict that can sent by Flask directly.
+    """Returns the fields of this User without changing it or its password hash. ObjectIds and
+      sets are encoded by `models.serialize` when the response is written.
 
       Returns:
-        - `dict`: a JSON-compatible dict of this object.
+        - `dict`: the fields of this User except `pw`
     """
-    # grab the dict
-    res = vars(self)
-
-    # manually convert any non-JSON fields
-    if self._id is not None:
-      res['_id'] = str(self._id) 
-    for s in self.types:
-      res[s + '_ids'] = [str(_id) for _id in getattr(self, s + '_ids')]
-
-    return res
\ No newline at end of file
+    return { k: v for k, v in vars(self).items() if k != 'pw' }
\ No newline at end of file
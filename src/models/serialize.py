@@ -0,0 +1,45 @@
+from bson import ObjectId
+from datetime import datetime
+import json
+
+# orjson is several times faster, but optional
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+def default(obj):
+  """Converts the types found in models and MongoDB documents that JSON can't encode.
+
+    Arguments:
+      - obj: the value that couldn't be encoded
+
+    Raises:
+      - `TypeError`: raised if obj is not an ObjectId, datetime, or set
+
+    Returns:
+      - a JSON-compatible value
+  """
+  if isinstance(obj, ObjectId):
+    return str(obj)
+  if isinstance(obj, datetime):
+    # same format the API has always returned
+    return str(obj)
+  if isinstance(obj, (set, frozenset)):
+    # sets of ObjectIds are converted in one pass instead of one callback per _id
+    return [ str(v) if isinstance(v, ObjectId) else v for v in obj ]
+  raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps(obj) -> bytes:
+  """Encodes obj as JSON. Models and documents are read, never changed, so the same object can
+    be encoded any number of times.
+
+    Arguments:
+      - obj: a JSON-compatible value that may contain ObjectIds, datetimes, and sets
+
+    Returns:
+      - `bytes`: UTF-8 encoded JSON
+  """
+  if orjson is not None:
+    return orjson.dumps(obj, default = default, option = orjson.OPT_PASSTHROUGH_DATETIME)
+  return json.dumps(obj, default = default, separators = (",", ":")).encode("utf-8")
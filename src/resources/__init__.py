@@ -1,2 +1,4 @@
 from .single import SingleUser, SingleDrink, SingleReview
 from .multiple import MultipleUser, MultipleDrink, MultipleReview
+from .multiple import UserItems, DrinkReviews, DrinkRanking, DrinkSearch, DrinkSuggest, Search
+from .multiple import DrinkSimilar, UserFeed, Batch, CacheStats
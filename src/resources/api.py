@@ -0,0 +1,25 @@
+from flask_restful import Api as BaseApi
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import InvalidTokenError
+
+class Api(BaseApi):
+  """Flask-RESTful Api that leaves the errors of flask_jwt_extended to the handlers it registers
+    on the app. Flask-RESTful answers every other error itself, which turns a missing or invalid
+    token into a 500 unless `PROPAGATE_EXCEPTIONS` is set.
+  """
+  def handle_error(self, e: Exception):
+    """Re-raises token errors so they fall through to the app's error handlers, see
+      `Api.error_router`. Every other error is handled by Flask-RESTful.
+
+      Arguments:
+        - e { Exception }: the error raised by a resource
+
+      Raises:
+        - `JWTExtendedException` or `InvalidTokenError`: e, if it is a token error
+
+      Returns:
+        - `Response`
+    """
+    if isinstance(e, (JWTExtendedException, InvalidTokenError)):
+      raise e
+    return super().handle_error(e)
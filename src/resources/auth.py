@@ -0,0 +1,39 @@
+from flask_jwt_extended import JWTManager, create_access_token
+from datetime import timedelta as delta
+from os import environ
+from models import User
+
+def createToken(user: User) -> str:
+  """Creates an access token for user. The claims only hold the user's email (`sub`), _id
+    (`uid`), and token version (`ver`), so the token stays small no matter how active the user is.
+
+    Arguments:
+      - user { User }
+
+    Returns:
+      - `str`: a JWT that expires after 12 hours
+  """
+  claims = { "uid": str(user._id), "ver": user.ver }
+  return create_access_token(user.email, additional_claims = claims, expires_delta = delta(hours = 12))
+
+def registerLoaders(jwt: JWTManager) -> None:
+  """Registers the identity loader when `JWT_LOAD_USER` is set. The loader makes the User
+    available as `flask_jwt_extended.current_user` on protected routes and rejects tokens issued
+    before the user's version was bumped (e.g. after a password change). Users are read through
+    the driver's cache.
+
+    Arguments:
+      - jwt { JWTManager }
+  """
+  if environ.get("JWT_LOAD_USER", "0") != "1":
+    return
+
+  from db.driver import DBdriver
+
+  @jwt.user_lookup_loader
+  def loadUser(header: dict, payload: dict) -> User or None:
+    user = DBdriver().getUser(payload["sub"])
+    # None makes flask_jwt_extended reject the request
+    if user is None or user.ver != payload.get("ver", 0):
+      return None
+    return user
@@ -0,0 +1,48 @@
+# max items created by one bulk request
+BULK_MAX = 1000
+# max users created by one bulk request, every password is hashed within `BCRYPT_TIMEOUT`
+BULK_SIGNUP_MAX = 16
+
+def checkBulk(items: list, limit: int = BULK_MAX) -> tuple[dict, int] or None:
+  """Checks the size of a bulk request, see `Schema.parseMany`.
+
+    Arguments:
+      - items { list }
+      - limit { int, optional }: max items. Defaults to `BULK_MAX`
+
+    Returns:
+      - `tuple[dict, int]` or `None`: the error to return, `None` if the size is fine.
+  """
+  if not len(items):
+    return ({ "data": { "err": "Body cannot be an empty array." } }, 400)
+  if len(items) > limit:
+    return ({ "data": { "err": f"Body cannot hold more than {limit} items." } }, 413)
+  return None
+
+def itemError(e: Exception) -> tuple[str, int]:
+  """Translates the exception a `DBdriver.bulkCreate*` method returned for an item.
+
+    Arguments:
+      - e { Exception }
+
+    Returns:
+      - `tuple[str, int]`: the errmsg and status of the item
+  """
+  msg = e.args[0] if len(e.args) else str(e)
+  return (msg, 404 if isinstance(e, KeyError) else 500)
+
+def bulkResponse(results: list[tuple]) -> tuple[dict, int]:
+  """Combines the results of every item of a bulk request. Each item gets its own status, with
+    its JSON under `data`, or its errmsg under `err` if the status is an error.
+
+    Arguments:
+      - results { list[tuple] }: (JSON or errmsg, status) of each item, in order
+
+    Returns:
+      - `tuple[dict, int]`: the items with a 201 if every item was created, 207 otherwise.
+  """
+  items = [
+    { "status": status, ("data" if status < 400 else "err"): res } for res, status in results
+  ]
+  created = all(status == 201 for _, status in results)
+  return ({ "data": items }, 201 if created else 207)
@@ -0,0 +1,151 @@
+from os import environ, getpid, cpu_count
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, TimeoutError
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+import bcrypt
+
+class PoolSaturated(Exception):
+  """Raised when every hashing worker is busy and the queue is full."""
+
+def _hash(pw: bytes, rounds: int) -> bytes:
+  return bcrypt.hashpw(pw, bcrypt.gensalt(rounds))
+
+def _check(pw: bytes, hashed: bytes) -> bool:
+  return bcrypt.checkpw(pw, hashed)
+
+class Hasher:
+  def __init__(
+    self, workers: int = None, queue: int = 16, rounds: int = 12,
+    timeout: float = 5.0, kind: str = "thread"
+  ) -> None:
+    """Runs bcrypt on a bounded pool so hashing can't starve the request threads. Calls fail
+      fast with `PoolSaturated` instead of waiting when the pool and its queue are full.
+
+      Arguments:
+        - workers { int, optional }: number of workers. Defaults to None for the number of CPUs
+        - queue { int, optional }: max calls waiting for a worker. Defaults to 16
+        - rounds { int, optional }: bcrypt cost factor for new hashes. Defaults to 12
+        - timeout { float, optional }: max seconds to wait for a result. Defaults to 5.0
+        - kind { str, optional }: one of ["thread", "process"]. Defaults to "thread"
+    """
+    workers = workers or cpu_count() or 1
+    executor = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+    self.pool = executor(max_workers = workers)
+    self.slots = BoundedSemaphore(workers + queue)
+    self.rounds = rounds
+    self.timeout = timeout
+
+  def hash(self, pw: str) -> str:
+    """Hashes pw with a new salt.
+
+      Arguments:
+        - pw { str }
+
+      Raises:
+        - `PoolSaturated`: raised if the pool is full or the result took too long
+
+      Returns:
+        - `str`: the bcrypt hash
+    """
+    return self._run(_hash, pw.encode("utf-8"), self.rounds).decode("utf-8")
+
+  def check(self, pw: str, hashed: str) -> bool:
+    """Checks pw against a bcrypt hash.
+
+      Arguments:
+        - pw { str }
+        - hashed { str }: a hash created by `hash`
+
+      Raises:
+        - `PoolSaturated`: raised if the pool is full or the result took too long
+
+      Returns:
+        - `bool`: True if pw matches, False otherwise.
+    """
+    return self._run(_check, pw.encode("utf-8"), hashed.encode("utf-8"))
+
+  def hashMany(self, pws: list[str]) -> list[str]:
+    """Hashes every password of pws on the pool at once. Either every password gets a slot in
+      the pool or none is hashed, and the whole batch shares a single timeout.
+
+      Arguments:
+        - pws { list[str] }
+
+      Raises:
+        - `PoolSaturated`: raised if the pool can't take every password or the results took
+          too long
+
+      Returns:
+        - `list[str]`: the bcrypt hash of each password, in order
+    """
+    # reserve every slot without waiting, or none
+    reserved = 0
+    while reserved < len(pws) and self.slots.acquire(blocking = False):
+      reserved += 1
+    if reserved < len(pws):
+      for _ in range(reserved):
+        self.slots.release()
+      raise PoolSaturated("Password hashing pool is saturated")
+
+    futures = []
+    try:
+      for pw in pws:
+        future = self.pool.submit(_hash, pw.encode("utf-8"), self.rounds)
+        future.add_done_callback(lambda _: self.slots.release())
+        futures.append(future)
+    except BaseException:
+      for _ in range(len(pws) - len(futures)):
+        self.slots.release()
+      raise
+
+    # one deadline for the whole batch
+    deadline = monotonic() + self.timeout
+    try:
+      return [ future.result(timeout = max(0, deadline - monotonic())).decode("utf-8") for future in futures ]
+    except TimeoutError:
+      for future in futures:
+        future.cancel()
+      raise PoolSaturated("Password hashing timed out")
+
+  def _run(self, fn, *args):
+    # reserve a slot without waiting
+    if not self.slots.acquire(blocking = False):
+      raise PoolSaturated("Password hashing pool is saturated")
+
+    try:
+      future = self.pool.submit(fn, *args)
+    except BaseException:
+      self.slots.release()
+      raise
+    future.add_done_callback(lambda _: self.slots.release())
+
+    try:
+      return future.result(timeout = self.timeout)
+    except TimeoutError:
+      raise PoolSaturated("Password hashing timed out")
+
+_hasher: Hasher = None
+_pid: int = None
+_lock = Lock()
+
+def getHasher() -> Hasher:
+  """Returns the hasher of this process, created on first use from `BCRYPT_WORKERS`,
+    `BCRYPT_QUEUE`, `BCRYPT_ROUNDS`, `BCRYPT_TIMEOUT`, and `BCRYPT_POOL`. Forked workers get
+    their own pool.
+
+    Returns:
+      - `Hasher`
+  """
+  global _hasher, _pid
+  if _hasher is None or _pid != getpid():
+    with _lock:
+      if _hasher is None or _pid != getpid():
+        _hasher = Hasher(
+          int(environ.get("BCRYPT_WORKERS", 0)) or None,
+          int(environ.get("BCRYPT_QUEUE", 16)),
+          int(environ.get("BCRYPT_ROUNDS", 12)),
+          float(environ.get("BCRYPT_TIMEOUT", 5)),
+          environ.get("BCRYPT_POOL", "thread")
+        )
+        _pid = getpid()
+  return _hasher
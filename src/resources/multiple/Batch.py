@@ -0,0 +1,173 @@
+from os import environ, getpid
+from inspect import signature
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from logging import getLogger
+from flask import Flask, Response, current_app, request
+from flask_restful import Resource
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from werkzeug.exceptions import HTTPException
+from db.driver import DBdriver
+from ..schema import Schema, Field
+
+log = getLogger(__name__)
+
+# max sub-requests in one batch
+BATCH_MAX = 50
+METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+
+_pool: ThreadPoolExecutor = None
+_pid: int = None
+_lock = Lock()
+
+def getPool() -> ThreadPoolExecutor:
+  """Returns the pool read-only sub-requests run on, created on first use with
+    `BATCH_WORKERS` threads. Forked workers get their own pool since threads don't survive a fork.
+
+    Returns:
+      - `ThreadPoolExecutor`
+  """
+  global _pool, _pid
+  if _pool is None or _pid != getpid():
+    with _lock:
+      if _pool is None or _pid != getpid():
+        _pool = ThreadPoolExecutor(max_workers = int(environ.get('BATCH_WORKERS', 8)))
+        _pid = getpid()
+  return _pool
+
+class Batch(Resource):
+  """API for running many API requests in a single round trip.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  post_args = Schema(Field("requests", dict, many = True))
+
+  def __init__(self) -> None:
+    self.db = DBdriver()
+
+  def post(self) -> tuple[dict, int]:
+    """Runs every sub-request against the other resources of the API in this process and
+      returns their results together. The token, if any, is verified once for the whole batch
+      and lets sub-requests call protected routes. Consecutive GETs run concurrently; every
+      other sub-request runs alone, in order, after the ones before it.
+
+      Arguments:
+        - `requests` { list[dict] } [API]: each with a `method` (defaults to GET), a `path`
+          with an optional query string, and an optional JSON `body`
+
+      Returns:
+        - `tuple[dict, int]`: the `status` and `body` of each sub-request, in order.
+    """
+    # grab args
+    args = self.post_args.parse()
+    verify_jwt_in_request(optional = True)
+    authorized = get_jwt_identity() is not None
+
+    # error handling
+    subs = args["requests"]
+    if subs is None or not len(subs):
+      return ({ "data": { "err": "Parameter `requests` cannot be empty." } }, 400)
+    if len(subs) > BATCH_MAX:
+      return ({ "data": { "err": f"Parameter `requests` cannot hold more than {BATCH_MAX} items." } }, 400)
+    for i, sub in enumerate(subs):
+      method = str(sub.get("method", "GET")).upper()
+      path = sub.get("path")
+      if method not in METHODS:
+        return ({ "data": { "err": f"Method of request {i} must be one of {list(METHODS)}." } }, 400)
+      if not isinstance(path, str) or not path.startswith("/") or path.split("?")[0].rstrip("/") == "/batch":
+        return ({ "data": { "err": f"Path of request {i} must be a path of the API other than /batch." } }, 400)
+
+    app = current_app._get_current_object()
+    headers = { "Authorization": request.headers["Authorization"] } if authorized else {}
+    run = lambda sub: self.run(app, sub, headers, authorized)
+
+    # GETs are grouped until the next write, which waits for them
+    res = []
+    reads = []
+    for sub in subs + [ None ]:
+      if sub is not None and str(sub.get("method", "GET")).upper() == "GET":
+        reads.append(sub)
+        continue
+
+      if len(reads) > 1:
+        res += list(getPool().map(run, reads))
+      elif len(reads):
+        res.append(run(reads[0]))
+      reads = []
+      if sub is not None:
+        res.append(run(sub))
+
+    return ({ "data": res }, 200)
+
+  def run(self, app: Flask, sub: dict, headers: dict, authorized: bool) -> dict:
+    """Runs a sub-request in its own request context, calling the resource's method directly
+      with the driver of the batch. Errors are answered by the handlers of the app, e.g. the
+      401 of flask_jwt_extended, as they would be outside a batch.
+
+      Arguments:
+        - app { Flask }
+        - sub { dict }: the sub-request, see `post`
+        - headers { dict }: headers passed on to the sub-request
+        - authorized { bool }: whether the batch carried a valid token
+
+      Returns:
+        - `dict`: the `status` and `body` of the sub-request
+    """
+    method = str(sub.get("method", "GET")).upper()
+    body = sub.get("body")
+    options = { "method": method, "headers": headers }
+    if body is not None:
+      options["json"] = body
+
+    with app.test_request_context(sub["path"], **options):
+      try:
+        if request.routing_exception is not None:
+          raise request.routing_exception
+
+        view = app.view_functions[request.url_rule.endpoint]
+        resource_class = getattr(view, "view_class", None)
+        fn = getattr(resource_class, method.lower(), None) if resource_class else None
+        if fn is None:
+          return { "status": 405, "body": { "message": "The method is not allowed for the requested URL." } }
+
+        # protected methods already passed the batch's auth check
+        if hasattr(fn, "__wrapped__"):
+          if not authorized:
+            return { "status": 401, "body": { "msg": "Missing Authorization Header" } }
+          fn = fn.__wrapped__
+
+        # resources that read the database take the driver of the batch
+        if "db" in signature(resource_class.__init__).parameters:
+          resource = resource_class(db = self.db)
+        else:
+          resource = resource_class()
+        res = fn(resource, **request.view_args)
+      except HTTPException as e:
+        return { "status": e.code, "body": getattr(e, "data", None) or { "message": e.description } }
+      except Exception as e:
+        try:
+          # re-raises if no handler is registered for e
+          res = app.make_response(app.handle_user_exception(e))
+        except Exception:
+          log.exception("Batched %s %s failed", method, sub["path"])
+          return { "status": 500, "body": { "message": "Internal Server Error" } }
+
+    if isinstance(res, Response):
+      return { "status": res.status_code, "body": res.get_json(silent = True) }
+    if isinstance(res, tuple):
+      return { "status": res[1] if len(res) > 1 else 200, "body": res[0] }
+    return { "status": 200, "body": res }
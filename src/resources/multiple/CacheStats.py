@@ -0,0 +1,20 @@
+from flask_restful import Resource
+from db.cache import getCache
+
+class CacheStats(Resource):
+  """API for the counters of the document cache.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    For more information on routes and returns see README.md.
+  """
+  def get(self) -> tuple[dict, int]:
+    """Gets the hit and miss counters of the worker that served the request.
+
+      Returns:
+        - `tuple[dict, int]`: `hits`, `shared_hits`, `misses`, and the number of cached documents
+    """
+    return ({ "data": getCache().stats() }, 200)
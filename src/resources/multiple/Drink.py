@@ -1,7 +1,10 @@
 from bson import ObjectId
 from db.driver import DBdriver
-from flask_restful import Resource, reqparse
+from flask_restful import Resource
 from flask_jwt_extended import jwt_required
+from ..stream import wantsNDJSON, ndjson
+from ..schema import Schema, Field, commaList
+from ..bulk import checkBulk, itemError, bulkResponse
 
 class MultipleDrink(Resource):
   """API for multiple drink endpoints.
@@ -22,15 +25,21 @@ class MultipleDrink(Resource):
     ```
     For more information on routes and returns see README.md.
   """
-  def __init__(self) -> None:
-    self.db = DBdriver()
+  get_args = Schema(Field("_ids", many = True), Field("sample", int), Field("fields", many = True))
+  post_args = Schema(
+    Field("user_email"), Field("name"), Field("ingredients", list, many = True),
+    Field("des"), Field("img")
+  )
+  delete_args = Schema(Field("_ids", many = True))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
     self.drink_dne = ({
       "data": {
         "res": None,
         "err": "Drink with that _id DNE"
       }
     }, 404)
-    self.parser = reqparse.RequestParser(bundle_errors = True)
 
   def get(self) -> tuple[dict, int]:
     """Gets a list of drinks given a list of _ids. If the parameter `sample` is provided,
@@ -40,18 +49,19 @@ class MultipleDrink(Resource):
       Arguments:
         - `_ids` { list[str] } [API]: list of _ids for drinks
         - `sample` { int } [API]: number of drinks to sample from the database
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
       
       Returns:
         - `tuple[dict, int]`: Returns a list of the corresponding drink objects. If a drink
           with the corresponding _id DNE, `None` is returned in its place. Returns an errmsg
-          if _ids parameter is missing or empty.
+          if _ids parameter is missing or empty or `fields` is invalid.
+        - `Response`: If the client accepts `application/x-ndjson`, streams the drinks one per line.
     """
-    # add args to the parser
-    self.parser.add_argument("_ids", type = str, action = "append")
-    self.parser.add_argument("sample", type = int)
     # grab args
-    args = self.parser.parse_args()
+    args = self.get_args.parse()
     
+    fields = commaList(args["fields"])
+
     # error handling and res 
     if args["_ids"] is not None and args["sample"] is not None: # both exist
       return ({ "data": { "err": "Cannot pass both _ids and sample parameters; choose one." } }, 400)
@@ -59,19 +69,25 @@ class MultipleDrink(Resource):
       if not len(args["_ids"]):
         return ({ "data": { "err": "Parameter `_ids` cannot be empty." } }, 400)
 
-      res = []
-      for _id in args["_ids"]:
-        drink = self.db.getDrink(ObjectId(_id))
-        res.append(None if drink is None else drink.toJSON())
+      try:
+        res = self.db.iterDrinks([ ObjectId(_id) for _id in args["_ids"] ], fields)
+      except ValueError as e:
+        return ({ "data": { "err": str(e) } }, 400)
     else: # sample may or may not exist
       sample = 9 if args["sample"] is None else args["sample"]
-      res = [ drink.toJSON() for drink in self.db.sampleDrinks(sample) ]
-    
-    return ({ "data": res }, 200)
+      try:
+        res = self.db.iterSample("drink", sample, fields)
+      except ValueError as e:
+        return ({ "data": { "err": str(e) } }, 400)
+
+    if wantsNDJSON():
+      return ndjson(res)
+    return ({ "data": list(res) }, 200)
 
   @jwt_required()
   def post(self) -> tuple[dict, int]:
-    """Creates a Drink given the necessary data to make a drink.
+    """Creates a Drink given the necessary data to make a drink. If the body is an array,
+      creates a Drink for each of its objects instead, see `postMany`.
 
       Arguments:
         - `user_email` { str } [API]: creator's email
@@ -83,25 +99,66 @@ class MultipleDrink(Resource):
         - `tuple[dict, int]`: Returns the newly created Drink. If the Drink exists already,
           returns the existing drink.
     """
+    items = self.post_args.parseMany()
+    if items is not None:
+      return self.postMany(items)
+
     # grab args
-    self.parser.add_argument('user_email', type = str)
-    self.parser.add_argument('name', type = str)
-    self.parser.add_argument('ingredients', type = list, action= "append")
-    self.parser.add_argument("des", type = str)
-    self.parser.add_argument("img", type = str)
-    args = self.parser.parse_args()
-    
-    params = (args['user_email'], args["name"], args["ingredients"], args["img"], args["des"])
+    args = self.post_args.parse()
 
     # error handling 
-    if None in params:
-      return ({ "data": { "err": "Missing one of ['user_email', 'name', 'ingredients', 'img', 'des']" } }, 400)
-    if not len(args["ingredients"]):
-      return ({ "data": { "err": "Parameter `ingredients` cannot be empty." } }, 400)
+    err = self.checkPost(args)
+    if err is not None:
+      return ({ "data": { "err": err } }, 400)
 
     res = self.db.createDrink(args["user_email"], args["name"], args["ingredients"], args["img"], args["des"])
     return ({ "data": res.toJSON() }, 201)
 
+  def postMany(self, items: list[tuple[dict, dict]]) -> tuple[dict, int]:
+    """Creates a Drink for each object of an array body with a single bulk insert.
+
+      Arguments:
+        - items { list[tuple[dict, dict]] }: the parsed objects, see `Schema.parseMany`
+
+      Returns:
+        - `tuple[dict, int]`: the status of each item with its Drink or errmsg, in order.
+          201 if every Drink was created, 207 otherwise.
+    """
+    # error handling
+    err = checkBulk(items)
+    if err is not None:
+      return err
+
+    res = [ None ] * len(items)
+    valid = []
+    for i, (args, errors) in enumerate(items):
+      err = errors or self.checkPost(args)
+      if err:
+        res[i] = (err, 400)
+      else:
+        valid.append(i)
+
+    drinks = self.db.bulkCreateDrinks([
+      (items[i][0]["user_email"], items[i][0]["name"], items[i][0]["ingredients"], items[i][0]["img"], items[i][0]["des"])
+      for i in valid
+    ])
+    for i, drink in zip(valid, drinks):
+      res[i] = itemError(drink) if isinstance(drink, Exception) else (drink.toJSON(), 201)
+    return bulkResponse(res)
+
+  def checkPost(self, args: dict) -> str or None:
+    """Checks the args of a new Drink.
+
+      Returns:
+        - `str` or `None`: the errmsg, `None` if args are valid.
+    """
+    params = (args['user_email'], args["name"], args["ingredients"], args["img"], args["des"])
+    if None in params:
+      return "Missing one of ['user_email', 'name', 'ingredients', 'img', 'des']"
+    if not len(args["ingredients"]):
+      return "Parameter `ingredients` cannot be empty."
+    return None
+
   @jwt_required()
   def delete(self) -> tuple[dict, int]:
     """Removes drinks from the database given a list of corresponding _ids.
@@ -118,8 +175,7 @@ class MultipleDrink(Resource):
         - `tuple[dict, int]`: [description]
     """
     # grab args
-    self.parser.add_argument("_ids", type = str, action = "append")
-    args = self.parser.parse_args()
+    args = self.delete_args.parse()
 
     # error handling 
     if args["_ids"] is None:
@@ -127,5 +183,6 @@ class MultipleDrink(Resource):
     elif not len(args["_ids"]):
       return ({ "data": { "err": "Parameter `_ids` cannot be empty." } }, 400)
 
-    res = [ _id if self.db.deleteDrink(ObjectId(_id)) else None for _id in args["_ids"] ]
+    deleted = self.db.deleteDrinks([ ObjectId(_id) for _id in args["_ids"] ])
+    res = [ _id if ok else None for _id, ok in zip(args["_ids"], deleted) ]
     return ({ "data": res }, 200)
\ No newline at end of file
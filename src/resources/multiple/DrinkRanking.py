@@ -0,0 +1,64 @@
+from itertools import islice
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..stream import wantsNDJSON, ndjson
+from ..schema import Schema, Field, commaList
+
+class DrinkRanking(Resource):
+  """API for the top-rated and trending drink leaderboards.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(Field("limit", int), Field("after"), Field("fields", many = True))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+
+  def get(self, board: str) -> tuple[dict, int]:
+    """Gets a page of the best or trending drinks.
+
+      Arguments:
+        - board { str } [ROUTE]: one of ['top', 'trending']
+        - `limit` { int } [API]: max drinks in the page. Defaults to 20, at most 100
+        - `after` { str } [API]: continuation token of the previous page
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+
+      Returns:
+        - `tuple[dict, int]`: the page of drinks and the token of the next page.
+        - `Response`: If the client accepts `application/x-ndjson`, streams the drinks one per
+          line. Every drink is streamed unless `limit` is passed; `after` is ignored.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    stream = wantsNDJSON()
+    limit = 20 if args["limit"] is None and not stream else args["limit"]
+    if limit is not None and not 0 < limit <= 100:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 100." } }, 400)
+
+    fields = commaList(args["fields"])
+
+    try:
+      if stream:
+        drinks = self.db.iterRanking(board, fields)
+        return ndjson(islice(drinks, limit))
+      drinks, token = self.db.pageRanking(board, limit, args["after"], fields)
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+
+    return ({ "data": { "items": drinks, "next": token } }, 200)
@@ -0,0 +1,78 @@
+from itertools import islice
+from bson import ObjectId
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..stream import wantsNDJSON, ndjson
+from ..schema import Schema, Field, commaList
+
+class DrinkReviews(Resource):
+  """API for listing the reviews of a drink.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(Field("limit", int), Field("after"), Field("sort"), Field("fields", many = True))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+    self.drink_dne = ({
+      "data": {
+        "res": None,
+        "err": "Drink with that _id DNE"
+      }
+    }, 404)
+
+  def get(self, _id: str) -> tuple[dict, int]:
+    """Gets a page of the reviews of the drink with the given _id.
+
+      Arguments:
+        - _id { str } [ROUTE]: ObjectId of the drink
+        - `limit` { int } [API]: max reviews in the page. Defaults to 20, at most 100
+        - `after` { str } [API]: continuation token of the previous page
+        - `sort` { str } [API]: one of ['_id', 'date'], prefixed with `-` for descending
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+
+      Returns:
+        - `tuple[dict, int]`: If the drink DNE, returns None. Otherwise, returns the page of
+          reviews and the token of the next page.
+        - `Response`: If the client accepts `application/x-ndjson`, streams the reviews one per
+          line. Every review is streamed unless `limit` is passed; `after` is ignored.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    stream = wantsNDJSON()
+    limit = 20 if args["limit"] is None and not stream else args["limit"]
+    if limit is not None and not 0 < limit <= 100:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 100." } }, 400)
+    sort = "_id" if args["sort"] is None else args["sort"]
+    if sort.lstrip("-") not in ["_id", "date"]:
+      return ({ "data": { "err": "Parameter `sort` must be one of ['_id', 'date']." } }, 400)
+
+    fields = commaList(args["fields"])
+
+    try:
+      if stream:
+        reviews = self.db.iterDrinkReviews(ObjectId(_id), sort, fields)
+        return ndjson(islice(reviews, limit))
+      reviews, token = self.db.pageDrinkReviews(ObjectId(_id), limit, args["after"], sort, fields)
+    except KeyError:
+      return self.drink_dne
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+
+    return ({ "data": { "items": reviews, "next": token } }, 200)
@@ -0,0 +1,64 @@
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..schema import Schema, Field, commaList
+
+class DrinkSearch(Resource):
+  """API for finding drinks by their ingredients.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(
+    Field("ingredient", many = True), Field("match"), Field("limit", int), Field("after"),
+    Field("fields", many = True)
+  )
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+
+  def get(self) -> tuple[dict, int]:
+    """Gets a page of the drinks made with the given ingredients, best matches first.
+
+      Arguments:
+        - `ingredient` { list[str] } [API]: names of the ingredients, repeated. Required
+        - `match` { str } [API]: one of ['all', 'any']. Defaults to 'all'
+        - `limit` { int } [API]: max drinks in the page. Defaults to 20, at most 100
+        - `after` { str } [API]: continuation token of the previous page
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+
+      Returns:
+        - `tuple[dict, int]`: the page of drinks and the token of the next page. Returns an
+          errmsg if no ingredient is given or a parameter is invalid.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    if not args["ingredient"]:
+      return ({ "data": { "err": "Parameter `ingredient` is required." } }, 400)
+    limit = 20 if args["limit"] is None else args["limit"]
+    if not 0 < limit <= 100:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 100." } }, 400)
+    match = "all" if args["match"] is None else args["match"]
+
+    try:
+      drinks, token = self.db.searchDrinks(
+        args["ingredient"], match, limit, args["after"], commaList(args["fields"])
+      )
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+
+    return ({ "data": { "items": drinks, "next": token } }, 200)
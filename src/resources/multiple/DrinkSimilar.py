@@ -0,0 +1,63 @@
+from bson import ObjectId
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..schema import Schema, Field, commaList
+
+class DrinkSimilar(Resource):
+  """API for "drinks like this" recommendations.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(Field("limit", int), Field("fields", many = True))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+    self.drink_dne = ({
+      "data": {
+        "res": None,
+        "err": "Drink with that _id DNE"
+      }
+    }, 404)
+
+  def get(self, _id: str) -> tuple[dict, int]:
+    """Gets the drinks with the most similar ingredients to the drink with the given _id.
+
+      Arguments:
+        - _id { str } [ROUTE]: ObjectId of the drink
+        - `limit` { int } [API]: max drinks. Defaults to 10, at most 20
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+
+      Returns:
+        - `tuple[dict, int]`: If the drink DNE, returns None. Otherwise, returns the similar
+          drinks, most similar first.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    limit = 10 if args["limit"] is None else args["limit"]
+    if not 0 < limit <= 20:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 20." } }, 400)
+
+    try:
+      res = self.db.similarDrinks(ObjectId(_id), limit, commaList(args["fields"]))
+    except KeyError:
+      return self.drink_dne
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+
+    return ({ "data": res }, 200)
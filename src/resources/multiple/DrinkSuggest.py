@@ -0,0 +1,50 @@
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..schema import Schema, Field
+
+class DrinkSuggest(Resource):
+  """API for drink name type-ahead.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(Field("prefix"), Field("limit", int))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+
+  def get(self) -> tuple[dict, int]:
+    """Suggests drinks with a word of their name starting with prefix.
+
+      Arguments:
+        - `prefix` { str } [API]: what the user typed so far. Required
+        - `limit` { int } [API]: max drinks. Defaults to 10, at most 50
+
+      Returns:
+        - `tuple[dict, int]`: the `_id`, `name`, and `rating` of the best rated matches.
+          Returns an errmsg if `prefix` is missing or `limit` is invalid.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    if args["prefix"] is None:
+      return ({ "data": { "err": "Parameter `prefix` is required." } }, 400)
+    limit = 10 if args["limit"] is None else args["limit"]
+    if not 0 < limit <= 50:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 50." } }, 400)
+
+    return ({ "data": self.db.suggestDrinks(args["prefix"], limit) }, 200)
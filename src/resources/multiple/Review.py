@@ -1,25 +1,28 @@
 from bson import ObjectId
 from flask_jwt_extended import jwt_required
 from db.driver import DBdriver
-from flask_restful import Resource, reqparse
+from flask_restful import Resource
+from ..stream import wantsNDJSON, ndjson
+from ..schema import Schema, Field, commaList
+from ..bulk import checkBulk, itemError, bulkResponse
 
 class MultipleReview(Resource):
+  get_args = Schema(Field("_ids", many = True), Field("sample", int), Field("fields", many = True))
+  post_args = Schema(Field("user_email"), Field("drink_id"), Field("comment"), Field("rating", int))
+  delete_args = Schema(Field("_ids", many = True))
 
-  def __init__(self) -> None:
-    self.db = DBdriver()
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
     self.drink_dne = {
       "data": {
         "res": None,
         "err": "Review with the _id DNE"
       }
     }, 404
-    self.parser = reqparse.RequestParser(bundle_errors = True)
 
   def get(self) -> tuple[dict, int]:
-    self.parser.add_argument("_ids", type = str, action = "append")
-    self.parser.add_argument("sample", type = int)
-
-    args = self.parser.parse_args()
+    args = self.get_args.parse()
+    fields = commaList(args["fields"])
 
     if args["_ids"] is not None and args["sample"] is not None:
       return ({"data": { "err": "Cannot pass both _ids and sample parameters; choose one." } }, 400)
@@ -27,38 +30,70 @@ class MultipleReview(Resource):
       if not len(args["_ids"]):
         return ({ "data": { "err": "Parameter `_ids` cannot be empty." } }, 400)
 
-      res = []
-      for _id in args["_ids"]:
-        review = self.db.getReview(ObjectId(_id))
-        res.append(None if review is None else review.toJSON())
+      try:
+        res = self.db.iterReviews([ ObjectId(_id) for _id in args["_ids"] ], fields)
+      except ValueError as e:
+        return ({ "data": { "err": str(e) } }, 400)
     else:
       sample = 10 if args["sample"] is None else args["sample"]
-      res = [ review.toJSON() for review in self.db.sampleReviews(sample) ]
+      try:
+        res = self.db.iterSample("review", sample, fields)
+      except ValueError as e:
+        return ({ "data": { "err": str(e) } }, 400)
 
-    return ({ "data": res }, 200)
+    if wantsNDJSON():
+      return ndjson(res)
+    return ({ "data": list(res) }, 200)
 
   @jwt_required()
   def post(self) -> tuple[dict, int]:
-    self.parser.add_argument('user_email', type = str)
-    self.parser.add_argument('drink_id', type = str)
-    self.parser.add_argument('comment', type = str)
-    self.parser.add_argument('rating', type = int)
-
-    args = self.parser.parse_args()
-    email, drink_id, comment, rating = params = (args['user_email'], args["drink_id"], args["comment"], args["rating"])
+    items = self.post_args.parseMany()
+    if items is not None:
+      return self.postMany(items)
 
-    if None in params:
-      return ({ "data": { "err": "Missing one of ['user_email', 'drink_id', 'comment', 'rating']" } }, 400)
-    if not len(comment):
-      return ({ "data": { "err": "Parameter `comment` cannot be empty." } }, 400)
+    args = self.post_args.parse()
+    err = self.checkPost(args)
+    if err is not None:
+      return ({ "data": { "err": err } }, 400)
 
-    res = self.db.createReview(email, ObjectId(drink_id), comment, rating)
+    res = self.db.createReview(args['user_email'], ObjectId(args["drink_id"]), args["comment"], args["rating"])
     return ({ "data": res.toJSON() }, 201)
 
+  def postMany(self, items: list[tuple[dict, dict]]) -> tuple[dict, int]:
+    err = checkBulk(items)
+    if err is not None:
+      return err
+
+    res = [ None ] * len(items)
+    valid = []
+    for i, (args, errors) in enumerate(items):
+      err = errors or self.checkPost(args)
+      if err:
+        res[i] = (err, 400)
+      else:
+        valid.append(i)
+
+    reviews = self.db.bulkCreateReviews([
+      (items[i][0]["user_email"], ObjectId(items[i][0]["drink_id"]), items[i][0]["comment"], items[i][0]["rating"])
+      for i in valid
+    ])
+    for i, review in zip(valid, reviews):
+      res[i] = itemError(review) if isinstance(review, Exception) else (review.toJSON(), 201)
+    return bulkResponse(res)
+
+  def checkPost(self, args: dict) -> str or None:
+    params = (args['user_email'], args["drink_id"], args["comment"], args["rating"])
+    if None in params:
+      return "Missing one of ['user_email', 'drink_id', 'comment', 'rating']"
+    if not len(args["comment"]):
+      return "Parameter `comment` cannot be empty."
+    if not ObjectId.is_valid(args["drink_id"]):
+      return "Parameter `drink_id` must be an ObjectId."
+    return None
+
   @jwt_required()
   def delete(self) -> tuple[dict, int]:
-    self.parser.add_argument("_ids", type = str, action = "append")
-    args = self.parser.parse_args()
+    args = self.delete_args.parse()
 
     if args["_ids"] is None:
       return ({ "data": { "err": "Parameter `_ids` required." } }, 400)
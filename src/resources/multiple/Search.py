@@ -0,0 +1,57 @@
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..schema import Schema, Field, commaList
+
+class Search(Resource):
+  """API for full-text search over drinks and reviews.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(Field("q"), Field("type", many = True), Field("limit", int))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+
+  def get(self) -> tuple[dict, int]:
+    """Searches the names and descriptions of drinks and the comments of reviews.
+
+      Arguments:
+        - `q` { str } [API]: the query. Required
+        - `type` { list[str] } [API]: any of ['drink', 'review'], comma-separated or repeated.
+          Defaults to both
+        - `limit` { int } [API]: max hits. Defaults to 20, at most 100
+
+      Returns:
+        - `tuple[dict, int]`: the hits, best first. Returns an errmsg if `q` is missing or a
+          parameter is invalid.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    if not args["q"]:
+      return ({ "data": { "err": "Parameter `q` is required." } }, 400)
+    limit = 20 if args["limit"] is None else args["limit"]
+    if not 0 < limit <= 100:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 100." } }, 400)
+
+    try:
+      res = self.db.searchText(args["q"], commaList(args["type"]), limit)
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+
+    return ({ "data": res }, 200)
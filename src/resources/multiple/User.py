@@ -1,10 +1,12 @@
 from db.driver import DBdriver
-from flask_restful import Resource, reqparse
-from flask_jwt_extended import jwt_required, create_access_token
-from datetime import timedelta as delta
-from os import environ
-from ..validator import validate
-import bcrypt
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, verify_jwt_in_request
+from .. import validator
+from ..hasher import getHasher, PoolSaturated
+from ..auth import createToken
+from ..stream import wantsNDJSON, ndjson
+from ..schema import Schema, Field, commaList
+from ..bulk import checkBulk, itemError, bulkResponse, BULK_SIGNUP_MAX
 
 class MultipleUser(Resource):
   """API for multiple User endpoints.
@@ -25,44 +27,60 @@ class MultipleUser(Resource):
     ```
     For more information on routes and returns see README.md.
   """
+  get_args = Schema(Field("emails", many = True), Field("fields", many = True))
+  post_args = Schema(
+    Field("fname"), Field("lname"), Field("email"), Field("pw"),
+    validator = validator.signup
+  )
+  delete_args = Schema(Field("emails", many = True))
 
-  def __init__(self):
-    self.db = DBdriver()
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
     self.user_dne = ({
       "data": {
         "res": None,
         "err": "User with that email DNE."
       }
     }, 404)
-    self.parser = reqparse.RequestParser()
+    self.busy = ({
+      "data": {
+        "res": None,
+        "err": "Server is busy, try again shortly."
+      }
+    }, 503, { "Retry-After": "1" })
 
   def get(self) -> tuple[dict, int]:
     """Gets a list of Users given a list of emails.
 
       Arguments:
         - `emails` { list[str] } [API]: list of emails for Users
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
       
       Returns:
         - `tuple[dict, int]`: Returns a list of the corresponding User objects. If a user
           with the corresponding _id DNE, `None` is returned in its place. Returns an errmsg
-          if emails parameter is missing or empty.
+          if emails parameter is missing or empty or `fields` is invalid. Passwords are never
+          returned.
+        - `Response`: If the client accepts `application/x-ndjson`, streams the users one per line.
     """
     # grab args
-    self.parser.add_argument("emails", type = str, action = "append")
-    args = self.parser.parse_args()
+    args = self.get_args.parse()
     
     # error handling
     if args["emails"] is None:
       return ({ "data": { "err": "Parameter `emails` cannot be empty." } }, 400)
 
-    res = []
-    for email in args["emails"]:
-      user = self.db.getUser(email)
-      res.append(None if user is None else user.toJSON())
-    return ({ "data": res }, 200)
+    try:
+      res = self.db.iterUsers(args["emails"], commaList(args["fields"]))
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+    if wantsNDJSON():
+      return ndjson(res)
+    return ({ "data": list(res) }, 200)
 
   def post(self) -> tuple[dict, int]:
-    """Creates a User given the necessary data. Analogous to signing up.
+    """Creates a User given the necessary data. Analogous to signing up. If the body is an
+      array, creates a User for each of its objects instead, see `postMany`.
       Arguments:
         - `fname` { str } [API]: first name
         - `lname` { str } [API]: last name
@@ -70,30 +88,75 @@ class MultipleUser(Resource):
         - `pw` { str } [API]: password
       
       Returns:
-        - `tuple[dict, int]`: If the form is incorrect, returns the errors. Otherwise, returns a
-        dict containing the token and the user.
+        - `tuple[dict, int]`: If the form is incorrect, returns the errors. If every password
+        worker is busy, returns None with a 503. Otherwise, returns a dict containing the token
+        and the user.
     """
+    items = self.post_args.parseMany()
+    if items is not None:
+      return self.postMany(items)
+
     # grab args
-    self.parser.add_argument("fname", type = str)
-    self.parser.add_argument("lname", type = str)
-    self.parser.add_argument("email", type = str)
-    self.parser.add_argument("pw", type = str)
-    args = self.parser.parse_args()
+    args = self.post_args.parse()
 
     # error handling
-    errors = validate(args, mode="signup")
+    errors = self.post_args.validate(args)
     if len(errors) != 0:
       return ({ "data": errors }, 400)
 
     # hash pw and create user
-    hashed = bcrypt.hashpw(args["pw"].encode("utf-8"), bcrypt.gensalt())
-    hashed = hashed.decode("utf-8")
+    try:
+      hashed = getHasher().hash(args["pw"])
+    except PoolSaturated:
+      return self.busy
     res = self.db.createUser(args["fname"], args["lname"], args["email"], hashed)
 
     # create token
-    token = create_access_token(res.toJSON(), expires_delta=delta(hours=12))
+    token = createToken(res)
     return ({ "data": { "token": token, "user": res.toJSON() } }, 201)
 
+  def postMany(self, items: list[tuple[dict, dict]]) -> tuple[dict, int]:
+    """Creates a User for each object of an array body with a single bulk insert. Unlike
+      signing up, this requires a token and no tokens are returned. Every password is hashed
+      concurrently, so at most `BULK_SIGNUP_MAX` users are created at once.
+
+      Arguments:
+        - items { list[tuple[dict, dict]] }: the parsed objects, see `Schema.parseMany`
+
+      Returns:
+        - `tuple[dict, int]`: the status of each item with its User or errors, in order.
+          201 if every User was created, 207 otherwise.
+    """
+    verify_jwt_in_request()
+
+    # error handling
+    err = checkBulk(items, BULK_SIGNUP_MAX)
+    if err is not None:
+      return err
+
+    res = [ None ] * len(items)
+    valid = []
+    for i, (args, errors) in enumerate(items):
+      errors = errors or self.post_args.validate(args)
+      if len(errors):
+        res[i] = (errors, 400)
+      else:
+        valid.append(i)
+
+    # hash every password on the pool at once
+    try:
+      hashes = getHasher().hashMany([ items[i][0]["pw"] for i in valid ])
+    except PoolSaturated:
+      return self.busy
+
+    users = self.db.bulkCreateUsers([
+      (items[i][0]["fname"], items[i][0]["lname"], items[i][0]["email"], hashed)
+      for i, hashed in zip(valid, hashes)
+    ])
+    for i, user in zip(valid, users):
+      res[i] = itemError(user) if isinstance(user, Exception) else (user.toJSON(), 201)
+    return bulkResponse(res)
+
   @jwt_required()
   def delete(self) -> tuple[dict, int]:
     """Removes Users from the database given a list of corresponding emails.
@@ -106,8 +169,7 @@ class MultipleUser(Resource):
           Returns an errmsg if emails parameter is missing or empty.
     """
     # grab args
-    self.parser.add_argument("emails", type = str, action = "append")
-    args = self.parser.parse_args()
+    args = self.delete_args.parse()
 
     # error handling
     if args["emails"] is None:
@@ -0,0 +1,62 @@
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..schema import Schema, Field, commaList
+
+class UserFeed(Resource):
+  """API for the personalized drink feed of a user.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(Field("limit", int), Field("fields", many = True))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+    self.user_dne = ({
+      "data": {
+        "res": None,
+        "err": "User with that email DNE"
+      }
+    }, 404)
+
+  def get(self, email: str) -> tuple[dict, int]:
+    """Gets the drinks recommended to the user with the given email.
+
+      Arguments:
+        - email { str } [ROUTE]: email of the user
+        - `limit` { int } [API]: max drinks. Defaults to 20, at most 50
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+
+      Returns:
+        - `tuple[dict, int]`: If the user DNE, returns None. Otherwise, returns the drinks of
+          the feed, best first.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    limit = 20 if args["limit"] is None else args["limit"]
+    if not 0 < limit <= 50:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 50." } }, 400)
+
+    try:
+      res = self.db.userFeed(email, limit, commaList(args["fields"]))
+    except KeyError:
+      return self.user_dne
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+
+    return ({ "data": res }, 200)
@@ -0,0 +1,78 @@
+from itertools import islice
+from db.driver import DBdriver
+from flask_restful import Resource
+from ..stream import wantsNDJSON, ndjson
+from ..schema import Schema, Field, commaList
+
+class UserItems(Resource):
+  """API for listing the drinks, favorites, or reviews of a user.
+    All routes return a JSON object and an HTTP status code. This is represented by a tuple where
+    the first element is a JSON-compatible dict and the second element is an integer.
+    
+    Returns for each route are broken into two categories: potential JSON and status codes.
+    All returns have a `data` key where the value is either specified or an object containing
+    the specified data.
+    If there is an error in execution, returns a JSON object with the following structure:
+    ```
+    {
+      "data": {
+        "res": as specified,
+        "err": error message
+      }
+    }
+    ```
+    For more information on routes and returns see README.md.
+  """
+  get_args = Schema(Field("limit", int), Field("after"), Field("sort"), Field("fields", many = True))
+
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
+    self.user_dne = ({
+      "data": {
+        "res": None,
+        "err": "User with that email DNE"
+      }
+    }, 404)
+
+  def get(self, email: str, type: str) -> tuple[dict, int]:
+    """Gets a page of the drinks, favorites, or reviews of the user with the given email.
+
+      Arguments:
+        - email { str } [ROUTE]: email of the user
+        - type { str } [ROUTE]: one of ['drinks', 'favorites', 'reviews']
+        - `limit` { int } [API]: max items in the page. Defaults to 20, at most 100
+        - `after` { str } [API]: continuation token of the previous page
+        - `sort` { str } [API]: field to sort by, prefixed with `-` for descending
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+
+      Returns:
+        - `tuple[dict, int]`: If the user DNE, returns None. Otherwise, returns the page of
+          items and the token of the next page.
+        - `Response`: If the client accepts `application/x-ndjson`, streams the items one per
+          line. Every item is streamed unless `limit` is passed; `after` is ignored.
+    """
+    # grab args
+    args = self.get_args.parse()
+
+    # error handling
+    stream = wantsNDJSON()
+    limit = 20 if args["limit"] is None and not stream else args["limit"]
+    if limit is not None and not 0 < limit <= 100:
+      return ({ "data": { "err": "Parameter `limit` must be between 1 and 100." } }, 400)
+    sort = "_id" if args["sort"] is None else args["sort"]
+    if sort.lstrip("-") not in ["_id", "date"] or (sort.lstrip("-") == "date" and type != "reviews"):
+      return ({ "data": { "err": "Parameter `sort` must be one of ['_id', 'date']." } }, 400)
+
+    fields = commaList(args["fields"])
+
+    try:
+      if stream:
+        items = self.db.iterItems(type[:-1], email, sort, fields)
+        return ndjson(islice(items, limit))
+      items, token = self.db.pageItems(type[:-1], email, limit, args["after"], sort, fields)
+    except KeyError:
+      return self.user_dne
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+
+    return ({ "data": { "items": items, "next": token } }, 200)
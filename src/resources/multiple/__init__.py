@@ -1,3 +1,13 @@
 from .User import MultipleUser
 from .Drink import MultipleDrink
 from .Review import MultipleReview
+from .UserItems import UserItems
+from .DrinkReviews import DrinkReviews
+from .DrinkRanking import DrinkRanking
+from .DrinkSearch import DrinkSearch
+from .Search import Search
+from .DrinkSuggest import DrinkSuggest
+from .DrinkSimilar import DrinkSimilar
+from .UserFeed import UserFeed
+from .Batch import Batch
+from .CacheStats import CacheStats
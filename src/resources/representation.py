@@ -0,0 +1,19 @@
+from flask import make_response, Response
+from models.serialize import dumps
+
+def output_json(data, code: int, headers: dict = None) -> Response:
+  """Flask-RESTful representation for `application/json` that encodes with `models.serialize`,
+    so resources can return models' fields with ObjectIds, dates, and sets as is.
+
+    Arguments:
+      - data: the first element of the tuple returned by a resource
+      - code { int }: HTTP status code
+      - headers { dict, optional }: extra headers. Defaults to None
+
+    Returns:
+      - `Response`
+  """
+  res = make_response(dumps(data), code)
+  res.headers.extend(headers or {})
+  res.headers["Content-Type"] = "application/json"
+  return res
@@ -0,0 +1,123 @@
+from flask import request
+from flask_restful import abort
+
+class Field:
+  __slots__ = ("name", "type", "many")
+
+  def __init__(self, name: str, type = str, many: bool = False) -> None:
+    """A single argument of a request.
+
+      Arguments:
+        - name { str }: name of the argument in the JSON body or query string
+        - type { function, optional }: converts each raw value. Defaults to str
+        - many { bool, optional }: collect every value into a list. Defaults to False
+    """
+    self.name = name
+    self.type = type
+    self.many = many
+
+  def fromJSON(self, raw):
+    if raw is None:
+      return None
+    if self.many:
+      return [ self.type(v) for v in (raw if isinstance(raw, list) else [ raw ]) ]
+    return self.type(raw)
+
+  def fromValues(self, values):
+    if self.many:
+      return [ self.type(v) for v in values.getlist(self.name) ]
+    return self.type(values[self.name])
+
+class Schema:
+  def __init__(self, *fields: Field, validator = None) -> None:
+    """The arguments accepted by an endpoint. Schemas are built once when the resource is
+      imported and replace a `reqparse.RequestParser` built on every request. Arguments are read
+      from the JSON body first, then from the query string or form.
+
+      Arguments:
+        - fields { Field }
+        - validator { function, optional }: takes the parsed args and returns k,v pairs of
+          invalid fields and their errmsgs. Defaults to None
+    """
+    self.fields = fields
+    self.validator = validator
+
+  def parse(self) -> dict:
+    """Parses the current request. Missing arguments are `None`.
+
+      Raises:
+        - `HTTPException`: aborts with a 400 listing every argument that failed to convert,
+          like `reqparse` does with `bundle_errors`
+
+      Returns:
+        - `dict`: k,v pairs of argument names and their values
+    """
+    body = request.get_json(silent = True) if request.is_json else None
+    if not isinstance(body, dict):
+      body = {}
+
+    args, errors = self._convert(body, request.values)
+    if len(errors):
+      abort(400, message = errors)
+    return args
+
+  def parseMany(self) -> list[tuple[dict, dict]] or None:
+    """Parses a request whose JSON body is an array of objects, each holding the arguments of
+      one item. The query string is not read.
+
+      Returns:
+        - `list[tuple[dict, dict]]` or `None`: for each item, its args and the k,v pairs of
+          arguments that failed to convert and their errmsgs. `None` if the body isn't an array.
+    """
+    body = request.get_json(silent = True) if request.is_json else None
+    if not isinstance(body, list):
+      return None
+
+    res = []
+    for item in body:
+      if isinstance(item, dict):
+        res.append(self._convert(item, {}))
+      else:
+        res.append(({ field.name: None for field in self.fields }, { "item": "Must be an object" }))
+    return res
+
+  def _convert(self, body: dict, values) -> tuple[dict, dict]:
+    args = {}
+    errors = {}
+    for field in self.fields:
+      try:
+        if field.name in body:
+          args[field.name] = field.fromJSON(body[field.name])
+        elif field.name in values:
+          args[field.name] = field.fromValues(values)
+        else:
+          args[field.name] = None
+      except (TypeError, ValueError) as e:
+        args[field.name] = None
+        errors[field.name] = str(e)
+    return (args, errors)
+
+  def validate(self, args: dict) -> dict[str, str]:
+    """Runs the validator of this schema on args.
+
+      Arguments:
+        - args { dict }: the result of `parse`
+
+      Returns:
+        - `dict[str, str]`: k,v pairs of incorrect fields and the associated errmsgs.
+    """
+    return {} if self.validator is None else self.validator(args)
+
+def commaList(values: list[str] or None) -> list[str] or None:
+  """Flattens a repeated argument whose values may also be comma-separated, so both
+    `?fields=name,rating` and `?fields=name&fields=rating` work.
+
+    Arguments:
+      - values { list[str], optional }: the parsed values of a `many` field
+
+    Returns:
+      - `list[str]` or `None`: every non-empty value, `None` if values is None
+  """
+  if values is None:
+    return None
+  return [ v.strip() for value in values for v in value.split(",") if v.strip() ]
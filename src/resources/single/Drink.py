@@ -1,7 +1,8 @@
 from db.driver import DBdriver
 from bson import ObjectId
-from flask_restful import Resource, reqparse
+from flask_restful import Resource
 from flask_jwt_extended import jwt_required
+from ..schema import Schema, Field, commaList
 
 class SingleDrink(Resource):
   """API for single drink endpoints.
@@ -26,30 +27,42 @@ class SingleDrink(Resource):
 
     For more information on routes and returns see README.md.
   """
+  get_args = Schema(Field("fields", many = True), Field("include", many = True))
+  put_args = Schema(Field("fields", dict))
 
-  def __init__(self) -> None:
-    self.db = DBdriver()
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
     self.drink_dne = ({
       "data": {
         "res": None,
         "err": "Drink with that _id DNE"
       }
     }, 404)
-    self.parser = reqparse.RequestParser(bundle_errors = True)
 
   def get(self, _id: str) -> tuple[dict, int]:
     """Gets the drink with the given _id.
 
       Arguments:
         - _id { str } [ROUTE]: ObjectId
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+        - `include` { list[str] } [API]: related items to embed, any of ['reviews'], each
+          optionally suffixed with `:limit`
       
       Returns:
         - `tuple[dict, int]`: If the drink with the given _id DNE, returns None. If
-          a corresponding drink is found, returns it.
+          a corresponding drink is found, returns it. Returns an errmsg if `fields` or `include`
+          is invalid.
     """
+    # grab args
+    args = self.get_args.parse()
+
     # search for _id in DBdriver
-    res = self.db.getDrink(ObjectId(_id))
-    return self.drink_dne if not res else ({ "data": res.toJSON() }, 200)
+    try:
+      fields, include = commaList(args["fields"]), commaList(args["include"])
+      res = self.db.getDrinkDoc(ObjectId(_id), fields, include)
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+    return self.drink_dne if not res else ({ "data": res }, 200)
 
   @jwt_required()
   def put(self, _id: str) -> tuple[dict, int]:
@@ -65,8 +78,7 @@ class SingleDrink(Resource):
         given _id DNE, returns None. Otherwise, returns the newly updated Drink.
     """
     # grab args
-    self.parser.add_argument('fields', type = dict)
-    args = self.parser.parse_args()
+    args = self.put_args.parse()
 
     # error handling
     if args["fields"] is None:
@@ -1,7 +1,8 @@
 from db.driver import DBdriver
 from bson import ObjectId
-from flask_restful import Resource, reqparse
+from flask_restful import Resource
 from flask_jwt_extended import jwt_required
+from ..schema import Schema, Field, commaList
 
 class SingleReview(Resource):
     """API for single review endpoints.
@@ -21,25 +22,35 @@ class SingleReview(Resource):
            }
        }
     """
+    get_args = Schema(Field("fields", many = True), Field("include", many = True))
+    put_args = Schema(Field("fields", dict))
     
-    def __init__(self) -> None:
-        self.db = DBdriver()
+    def __init__(self, db: DBdriver = None) -> None:
+        self.db = DBdriver() if db is None else db
         self.review_dne = ({
             "data": {
                 "res": None,
                 "err": "Review with that _id DNE"
             }
         }, 404)
-        self.parser = reqparse.RequestParser(bundle_errors = True)
 
     def get(self, _id: str) -> tuple[dict, int]:
         """Gets the Review with the associated ObjectId.
             Route
             <String> _id: ObjectId of the review to be retrieved.
+            API
+            <Array> fields: fields to return, comma-separated or repeated.
+            <Array> include: related items to embed; only drink is supported.
             Returns: null if a review with the given ObjectId DNE. Otherwise, Review.
         """
-        res = self.db.getReview(ObjectId(_id))
-        return self.review_dne if not res else ({ "data": res.toJSON() }, 200)
+        args = self.get_args.parse()
+
+        try:
+            fields, include = commaList(args["fields"]), commaList(args["include"])
+            res = self.db.getReviewDoc(ObjectId(_id), fields, include)
+        except ValueError as e:
+            return ({ "data": { "err": str(e) } }, 400)
+        return self.review_dne if not res else ({ "data": res }, 200)
 
     @jwt_required()
     def put(self, _id: str) -> tuple[dict, int]:
@@ -52,8 +63,7 @@ class SingleReview(Resource):
             <Object> fields: key represents the property name to updated. value represents the new value.
             Returns: updated Review. If review's rating was updated returns an Object of the following structure:
         """
-        self.parser.add_argument('fields', type = dict)
-        args = self.parser.parse_args()
+        args = self.put_args.parse()
 
         if args["fields"] is None:
             return ({ "data": { "err": "Missing fields parameter." }}, 400)
@@ -1,10 +1,11 @@
-from flask_jwt_extended import create_access_token, jwt_required
+from flask_jwt_extended import jwt_required
 from db.driver import DBdriver
-from flask_restful import Resource, reqparse
-from datetime import timedelta as delta
+from flask_restful import Resource
 from bson import ObjectId
-import bcrypt
-from ..validator import validate
+from .. import validator
+from ..schema import Schema, Field, commaList
+from ..hasher import getHasher, PoolSaturated
+from ..auth import createToken
 
 class SingleUser(Resource):
   """API for single user endpoints.
@@ -25,29 +26,48 @@ class SingleUser(Resource):
     ```
     For more information on routes and returns see README.md.
   """
+  get_args = Schema(Field("fields", many = True), Field("include", many = True))
+  post_args = Schema(Field("email"), Field("pw"), validator = validator.login)
+  put_args = Schema(Field("fields", dict))
 
-  def __init__(self):
-    self.db = DBdriver()
+  def __init__(self, db: DBdriver = None) -> None:
+    self.db = DBdriver() if db is None else db
     self.user_dne = ({
       "data": {
         "res": None,
         "err": "User with that email DNE"
       }
     }, 404)
-    self.parser = reqparse.RequestParser(bundle_errors = True)
+    self.busy = ({
+      "data": {
+        "res": None,
+        "err": "Server is busy, try again shortly."
+      }
+    }, 503, { "Retry-After": "1" })
 
   def get(self, email: str) -> tuple[dict, int]:
     """Gets the user with the given _id.
       Arguments:
         - email { str } [ROUTE]: email of the user to be retrieved
+        - `fields` { list[str] } [API]: fields to return, comma-separated or repeated
+        - `include` { list[str] } [API]: related items to embed, any of
+          ['drinks', 'favorites', 'reviews'], each optionally suffixed with `:limit`
       
       Returns:
         - `tuple[dict, int]`: If the user with the given email DNE, returns None. If
-          a corresponding user is found, returns it.
+          a corresponding user is found, returns it without its password. Returns an errmsg
+          if `fields` or `include` is invalid.
     """
+    # grab args
+    args = self.get_args.parse()
+
     # grab the user
-    res = self.db.getUser(email)
-    return self.user_dne if res is None else ({ "data": res.toJSON() }, 200)
+    try:
+      fields, include = commaList(args["fields"]), commaList(args["include"])
+      res = self.db.getUserDoc(email, fields, include)
+    except ValueError as e:
+      return ({ "data": { "err": str(e) } }, 400)
+    return self.user_dne if res is None else ({ "data": res }, 200)
 
   def post(self, email: str) -> tuple[dict, int]:
     """Logs the user in. API route = "/users/login"
@@ -57,15 +77,14 @@ class SingleUser(Resource):
       
       Returns:
         - `tuple[dict, int]`: If the user with the given email DNE, returns None. If the form is
-        incorrect, returns the errors. Otherwise, returns a dict containing the token and the user.
+        incorrect, returns the errors. If every password worker is busy, returns None with a 503.
+        Otherwise, returns a dict containing the token and the user.
     """
     # grab args
-    self.parser.add_argument("email", type = str)
-    self.parser.add_argument("pw", type = str)
-    args = self.parser.parse_args()
+    args = self.post_args.parse()
 
     # error handling
-    errors = validate(args, mode="login")
+    errors = self.post_args.validate(args)
     if len(errors) != 0:
       return ({ "data": errors }, 400)
 
@@ -75,12 +94,15 @@ class SingleUser(Resource):
       return ({ "data": {"email": "User with that email does not exist"}}, 400)
     
     # check pw and create token
-    pw_match = bcrypt.checkpw(args["pw"].encode("utf-8"), user.pw.encode("utf-8"))
+    try:
+      pw_match = getHasher().check(args["pw"], user.pw)
+    except PoolSaturated:
+      return self.busy
 
     if not pw_match:
       return ({ "data": { "pw": "Password incorrect" } }, 400)
 
-    token = create_access_token(user.toJSON(), expires_delta=delta(hours=12))
+    token = createToken(user)
     return ({ "data": { "token": token, "user": user.toJSON() } }, 200)
   
   @jwt_required()
@@ -96,8 +118,7 @@ class SingleUser(Resource):
         given email DNE, returns None. Otherwise, returns the newly updated user.
     """
     # grab args
-    self.parser.add_argument("fields", type = dict)
-    args = self.parser.parse_args()
+    args = self.put_args.parse()
 
     # error handling
     if args["fields"] is None:
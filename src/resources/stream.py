@@ -0,0 +1,29 @@
+from flask import request, Response, stream_with_context
+from models.serialize import dumps
+
+NDJSON = "application/x-ndjson"
+
+def wantsNDJSON() -> bool:
+  """Checks if the client opted into streaming with `Accept: application/x-ndjson`.
+
+    Returns:
+      - `bool`: True if NDJSON is preferred over JSON, False otherwise.
+  """
+  return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+def ndjson(items) -> Response:
+  """Streams items as newline delimited JSON. Items are encoded one at a time as they're
+    pulled from the iterable, so memory stays flat and the first line is sent before the
+    query finishes.
+
+    Arguments:
+      - items { iterable }: objects `models.serialize` can encode, usually a lazy map over a cursor
+
+    Returns:
+      - `Response`: a streaming response with one JSON document per line
+  """
+  def generate():
+    for item in items:
+      yield dumps(item) + b"\n"
+
+  return Response(stream_with_context(generate()), mimetype = NDJSON)
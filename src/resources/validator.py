@@ -1,11 +1,11 @@
 import re
 
-email_regex = r"[\w\d+\.]+@[[\w\d+\.]+\.[\w\d]+"
-fname_regex = r"[\w-]+"
-lname_regex = r"[\w-]+[ \w\d]+\.{0,1}"
-upper = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-lower = upper.lower()
-nums = "1234567890"
+# compiled once at import
+email_regex = re.compile(r"[\w\d+\.]+@[\[\w\d+\.]+\.[\w\d]+")
+fname_regex = re.compile(r"[\w-]+")
+lname_regex = re.compile(r"[\w-]+[ \w\d]+\.{0,1}")
+upper_regex = re.compile(r"[A-Z]")
+lower_regex = re.compile(r"[a-z]")
 
 def validate(form: dict, mode="login") -> dict[str, str]:
   """Form validator.
@@ -32,7 +32,7 @@ def validate(form: dict, mode="login") -> dict[str, str]:
     fields += ["fname", "lname"]
 
   for field in fields:
-    if field not in form:
+    if form.get(field) is None:
       errors[field] = f"{pretty_err[field]} is required"
     elif len(form[field]) == 0:
       errors[field] = f"{pretty_err[field]} cannot be empty"
@@ -42,31 +42,27 @@ def validate(form: dict, mode="login") -> dict[str, str]:
 
   if mode == "signup":
     # check fname, lname against regex
-    if not re.match(fname_regex, form["fname"]):
+    if not fname_regex.match(form["fname"]):
       errors["fname"] = "First name can only contain letters and dashes"
-    if not re.match(lname_regex, form["lname"]):
+    if not lname_regex.match(form["lname"]):
       errors["lname"] = "Last name can only contain letters, dashes, numbers, and periods"
 
   # check email against regex
-  if not re.match(email_regex, form["email"]):
+  if not email_regex.match(form["email"]):
     errors["email"] = "Invalid email format"
 
-  has_upper = False
-  for c in upper:
-    if c in form["pw"]:
-      has_upper = True
-      break
-
-  has_lower = False
-  for c in lower:
-    if c in form["pw"]:
-      has_lower = True
-      break
-
-  if not has_upper or not has_lower:
+  if not upper_regex.search(form["pw"]) or not lower_regex.search(form["pw"]):
     errors["pw"] = "Password must contain at least one uppercase letter and one lowercase letter"
 
   if not 6 <= len(form["pw"]) <= 18:
     errors["pw"] = "Password must be between 6 and 18 characters"
 
-  return errors
\ No newline at end of file
+  return errors
+
+def signup(form: dict) -> dict[str, str]:
+  """Validates a sign up form. See `validate`."""
+  return validate(form, mode="signup")
+
+def login(form: dict) -> dict[str, str]:
+  """Validates a log in form. See `validate`."""
+  return validate(form, mode="login")
\ No newline at end of file
@@ -0,0 +1,92 @@
+"""Hammers the create paths of `DBdriver` from many threads and checks that concurrent requests
+  never create duplicates or count a rating twice.
+
+  Runs against a real MongoDB server since the unique indexes are what make the create paths
+  race-free: set `TEST_MONGODB_URI` (e.g. `mongodb://localhost:27017`) to a server the tests
+  may write to. A throwaway database is created and dropped, `capstone` is never touched.
+  Skipped when the variable is not set.
+
+  From the repository root: `python -m pytest tests`
+"""
+import sys
+import unittest
+from os import environ
+from pathlib import Path
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+URI = environ.get('TEST_MONGODB_URI')
+THREADS = 32
+USERS = 64
+
+@unittest.skipUnless(URI, 'TEST_MONGODB_URI is not set')
+class TestConcurrentCreates(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls) -> None:
+    environ['MONGODB_URI'] = URI
+    # every read must hit the database
+    environ['CACHE_SIZE'] = '0'
+    from db.driver import DBdriver
+    from db.indexes import ensureIndexes
+
+    cls.driver = DBdriver()
+    cls.name = f"capstone_test_{uuid4().hex}"
+    cls.driver.client = cls.driver.mongo[cls.name]
+    ensureIndexes(cls.driver.client)
+
+  @classmethod
+  def tearDownClass(cls) -> None:
+    cls.driver.mongo.drop_database(cls.name)
+
+  def hammer(self, fn, args: list) -> list:
+    # all calls start together, so the first ones race
+    with ThreadPoolExecutor(max_workers = THREADS) as pool:
+      return list(pool.map(lambda a: fn(*a), args))
+
+  def test_createUser(self) -> None:
+    email = f"{uuid4().hex}@test.com"
+    res = self.hammer(self.driver.createUser, [ ('f', 'l', email, 'pw') ] * THREADS)
+
+    self.assertEqual(self.driver.client.users.count_documents({ 'email': email }), 1)
+    self.assertEqual(len({ user._id for user in res }), 1)
+
+  def test_createDrink(self) -> None:
+    email = f"{uuid4().hex}@test.com"
+    self.driver.createUser('f', 'l', email, 'pw')
+    args = [ (email, name, [ 'gin' ], '', '') for name in ('a', 'b') for _ in range(THREADS) ]
+    res = self.hammer(self.driver.createDrink, args)
+
+    drinks = list(self.driver.client.drinks.find({ 'user_email': email }))
+    self.assertEqual(len(drinks), 2)
+    self.assertEqual({ drink._id for drink in res }, { drink['_id'] for drink in drinks })
+    user = self.driver.client.users.find_one({ 'email': email })
+    self.assertCountEqual(user['drink_ids'], [ drink['_id'] for drink in drinks ])
+
+  def test_createReview(self) -> None:
+    emails = [ f"{uuid4().hex}@test.com" for _ in range(USERS) ]
+    for email in emails:
+      self.driver.createUser('f', 'l', email, 'pw')
+    drink = self.driver.createDrink(emails[0], 'reviewed', [ 'gin' ], '', '')
+
+    # every user reviews the drink from several threads at once
+    ratings = { email: i % 5 + 1 for i, email in enumerate(emails) }
+    args = [ (email, drink._id, 'c', ratings[email]) for email in emails for _ in range(4) ]
+    res = self.hammer(self.driver.createReview, args)
+
+    reviews = list(self.driver.client.reviews.find({ 'drink_id': drink._id }))
+    self.assertEqual(len(reviews), USERS)
+    self.assertEqual({ review._id for review in res }, { review['_id'] for review in reviews })
+
+    # each rating is folded into the drink exactly once
+    doc = self.driver.client.drinks.find_one({ '_id': drink._id })
+    self.assertEqual(doc['count'], USERS)
+    self.assertEqual(doc['sum'], sum(ratings.values()))
+    self.assertCountEqual(doc['review_ids'], [ review['_id'] for review in reviews ])
+    for email in emails:
+      user = self.driver.client.users.find_one({ 'email': email })
+      self.assertEqual(len(user['review_ids']), 1)
+
+if __name__ == '__main__':
+  unittest.main()
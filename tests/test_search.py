@@ -0,0 +1,80 @@
+"""Checks that the local search index of `db.search` keeps the changes `DBdriver` publishes
+  while the index is being built, whichever side of the scan they land on, and picks up the
+  changes of other workers when it is rebuilt.
+
+  Needs no database: the collections are fakes that publish changes midway through `find`.
+
+  From the repository root: `python -m pytest tests`
+"""
+import sys
+import unittest
+from time import sleep
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'src'))
+
+from db.events import publish
+from db.search import LocalBackend
+
+class Collection:
+  # the only collection method `LocalBackend.load` calls
+  def __init__(self, docs: list[dict], during = None) -> None:
+    self.docs = docs
+    self.during = during
+
+  def find(self, query: dict, projection: dict):
+    # during runs once the first doc was read, before the others are
+    for i, doc in enumerate(self.docs):
+      yield doc
+      if i == 0 and self.during is not None:
+        self.during()
+
+class TestLocalBackend(unittest.TestCase):
+  def search(self, backend: LocalBackend, db: dict, q: str) -> list:
+    return [ _id for _, _, _id in backend.search(db, q, [ 'drinks', 'reviews' ], 10) ]
+
+  def test_changesDuringLoad(self) -> None:
+    def during() -> None:
+      # one drink the scan already read, one it is about to read, one it never sees
+      publish('drinks', 'update', 1, { '_id': 1, 'name': 'cortado' })
+      publish('drinks', 'delete', 2)
+      publish('reviews', 'create', 4, { '_id': 4, 'comment': 'great latte' })
+
+    db = {
+      'drinks': Collection([ { '_id': 1, 'name': 'mocha' }, { '_id': 2, 'name': 'latte' } ], during),
+      'reviews': Collection([ { '_id': 3, 'comment': 'too sweet' } ])
+    }
+    backend = LocalBackend()
+    backend.load(db)
+
+    self.assertEqual(self.search(backend, db, 'mocha'), [])
+    self.assertEqual(self.search(backend, db, 'cortado'), [ 1 ])
+    self.assertEqual(self.search(backend, db, 'latte'), [ 4 ])
+    self.assertEqual(self.search(backend, db, 'sweet'), [ 3 ])
+
+  def test_changesAfterLoad(self) -> None:
+    db = { 'drinks': Collection([ { '_id': 1, 'name': 'mocha' } ]), 'reviews': Collection([]) }
+    backend = LocalBackend()
+    self.assertEqual(self.search(backend, db, 'mocha'), [ 1 ])
+
+    publish('drinks', 'create', 2, { '_id': 2, 'name': 'iced mocha' })
+    publish('drinks', 'delete', 1)
+    self.assertEqual(self.search(backend, db, 'mocha'), [ 2 ])
+
+  def test_rebuildWhenStale(self) -> None:
+    db = { 'drinks': Collection([ { '_id': 1, 'name': 'mocha' } ]), 'reviews': Collection([]) }
+    backend = LocalBackend(ttl = 0)
+    self.assertEqual(self.search(backend, db, 'latte'), [])
+
+    # written by another worker, so never published here
+    db['drinks'].docs.append({ '_id': 2, 'name': 'latte' })
+    # a stale search starts the rebuild in the background
+    self.search(backend, db, 'latte')
+    for _ in range(100):
+      if not backend.refreshing:
+        break
+      sleep(0.01)
+    self.assertEqual(self.search(backend, db, 'latte'), [ 2 ])
+
+if __name__ == '__main__':
+  unittest.main()